@@ -3,25 +3,50 @@ Caching utilities for metadata and taste profile.
 Stores extracted track metadata and taste profile to avoid re-processing.
 """
 
-import json
+import os
+import sys
+import mmap
+import queue
 import logging
 import signal
 import atexit
 import hashlib
+import threading
+from heapq import nlargest
+from operator import itemgetter
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Set, Tuple
+from typing import Dict, Iterable, List, Optional, Any, Set, Tuple
+
+import ijson
+import orjson
+import zstandard as zstd
 
 from recommender import TrackInfo
 
 logger = logging.getLogger(__name__)
 
-CACHE_VERSION = "1.0"
+# BLAKE3 (SIMD-parallel) is much faster than SHA-256 on machines without
+# hardware SHA extensions; the fingerprint is not security-sensitive, so
+# either works - fall back to sha256 when blake3 isn't installed
+try:
+    from blake3 import blake3 as _fingerprint_hasher
+except ImportError:
+    _fingerprint_hasher = hashlib.sha256
+
+CACHE_VERSION = "2.0"  # 2.0: columnar track storage
 PROFILE_VERSION = "1.1"  # Bumped version for threshold logic
-DEFAULT_CACHE_FILE = "songs_metadata_cache.json"
-DEFAULT_PROFILE_FILE = "taste_profile_cache.json"
+DEFAULT_CACHE_FILE = "songs_metadata_cache.json.zst"
+DEFAULT_PROFILE_FILE = "taste_profile_cache.json.zst"
 DEFAULT_REBUILD_THRESHOLD = 75  # Only rebuild if track count differs by this much
 
+# Cache files are zstd-compressed JSON - decompression is faster than the
+# extra disk reads it saves. Old uncompressed caches are detected by the
+# absence of the zstd frame magic and still load fine.
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+_zstd_compressor = zstd.ZstdCompressor(level=3)
+_zstd_decompressor = zstd.ZstdDecompressor()
+
 # Global reference for signal handler
 _active_caches = []
 
@@ -69,48 +94,224 @@ def _register_cache(cache):
 # =============================================================================
 
 class MetadataCache:
-    """Cache for storing extracted music metadata."""
-    
+    """
+    Cache for storing extracted music metadata.
+
+    Tracks are stored column-wise (parallel lists per field) instead of one
+    nested dict per track - a dict costs a couple hundred bytes each, which
+    adds up fast across tens of thousands of entries. A file_id -> row index
+    is rebuilt at load time for lookups.
+
+    New entries are appended to a write-ahead log (one JSON line per track),
+    so auto-saves only write the new entries instead of rewriting the whole
+    cache file. save() checkpoints the full cache and truncates the log.
+    """
+
+    COLUMN_NAMES = (
+        "file_ids", "file_names", "file_paths", "file_sizes",
+        "titles", "artists", "albums", "genres", "years"
+    )
+
     def __init__(self, cache_path: str = DEFAULT_CACHE_FILE, auto_save_interval: int = 50):
         self.cache_path = Path(cache_path)
+        self.wal_path = self.cache_path.with_suffix('.wal')
         self.auto_save_interval = auto_save_interval
         self.data = self._load_cache()
+        self._index: Dict[str, int] = {
+            fid: row for row, fid in enumerate(self.data["columns"]["file_ids"])
+        }
         self._hits = 0
         self._misses = 0
         self._new_entries = 0
+        self._unflushed = 0
         self._dirty = False
-        
+        # Flyweight pool: one TrackInfo per file_id, built on first access,
+        # so repeated scans hand out references instead of reallocating
+        self._track_objs: Dict[str, TrackInfo] = {}
+
+        self._replay_wal()
+
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self._wal = open(self.wal_path, 'ab', buffering=1 << 16)
+
+        # Background writer: fsync stalls the scan loop for milliseconds at
+        # a time, so flushes are handed to a daemon thread instead.
+        # Reentrant because the SIGINT/SIGTERM handler calls save() ->
+        # _truncate_wal() on the main thread, which may already hold the
+        # lock inside _append_wal when the signal lands - a plain Lock
+        # deadlocks there and the cache would never be saved.
+        self._io_lock = threading.RLock()
+        self._flush_queue: queue.Queue = queue.Queue(maxsize=1)
+        self._flush_thread = threading.Thread(
+            target=self._flush_worker, daemon=True, name='metadata-cache-flush'
+        )
+        self._flush_thread.start()
+
         _register_cache(self)
+
+    def _flush_worker(self) -> None:
+        """Flush and fsync WAL appends off the main thread."""
+        while True:
+            item = self._flush_queue.get()
+            if item is None:
+                return
+            try:
+                with self._io_lock:
+                    self._wal.flush()
+                    os.fsync(self._wal.fileno())
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to flush WAL: {e}")
         
     def _load_cache(self) -> Dict[str, Any]:
         """Load cache from disk or create empty cache."""
         if self.cache_path.exists():
             try:
-                with open(self.cache_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
-                if data.get('version') != CACHE_VERSION:
-                    logger.warning("Cache version mismatch. Creating new cache.")
+                if self.cache_path.stat().st_size == 0:
+                    logger.warning("Metadata cache file is empty. Creating new cache.")
                     return self._empty_cache()
-                    
-                track_count = len(data.get('tracks', {}))
+
+                # mmap the file so the parser views bytes in place instead of
+                # copying the whole file into userspace first
+                with open(self.cache_path, 'rb') as f, \
+                        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    compressed = mm[:4] == ZSTD_MAGIC
+                    header = self._read_cache_header(self._cache_reader(mm, compressed))
+
+                    if header.get('version') != CACHE_VERSION:
+                        logger.warning("Cache version mismatch. Creating new cache.")
+                        return self._empty_cache()
+
+                    data = self._empty_cache()
+                    data["last_updated"] = header.get('last_updated')
+
+                    # Stream columns one at a time instead of holding the
+                    # raw bytes and the parsed dict in memory side by side
+                    mm.seek(0)
+                    columns = dict(ijson.kvitems(self._cache_reader(mm, compressed), 'columns'))
+
+                if not set(self.COLUMN_NAMES).issubset(columns):
+                    logger.warning("Cache column mismatch. Creating new cache.")
+                    return self._empty_cache()
+                # Ignore columns we no longer store (e.g. old cached_at)
+                data["columns"] = {name: columns[name] for name in self.COLUMN_NAMES}
+
+                track_count = len(columns["file_ids"])
                 logger.info(f"📦 Loaded metadata cache: {track_count} tracks")
                 return data
-                
-            except (json.JSONDecodeError, KeyError) as e:
+
+            except (ijson.JSONError, zstd.ZstdError, OSError, KeyError) as e:
                 logger.warning(f"Failed to load cache: {e}. Creating new cache.")
                 return self._empty_cache()
         else:
             logger.info("No existing metadata cache found.")
             return self._empty_cache()
-            
+
+    @staticmethod
+    def _cache_reader(mm, compressed: bool):
+        """File-like view over the mapped cache, decompressing if needed."""
+        if compressed:
+            return _zstd_decompressor.stream_reader(mm)
+        return mm
+
+    @staticmethod
+    def _read_cache_header(f) -> Dict[str, Any]:
+        """Read top-level scalar fields without parsing the columns map."""
+        header = {}
+        for prefix, event, value in ijson.parse(f):
+            if prefix == 'columns' and event == 'start_map':
+                break
+            if prefix in ('version', 'last_updated') and event in ('string', 'null'):
+                header[prefix] = value
+        return header
+
     def _empty_cache(self) -> Dict[str, Any]:
         return {
             "version": CACHE_VERSION,
             "last_updated": None,
-            "tracks": {}
+            "columns": {name: [] for name in self.COLUMN_NAMES}
         }
-        
+
+    def _replay_wal(self) -> None:
+        """Replay write-ahead log entries on top of the loaded checkpoint."""
+        if not self.wal_path.exists():
+            return
+
+        replayed = 0
+        good_offset = 0
+        corrupt_tail = False
+        try:
+            with open(self.wal_path, 'rb') as f:
+                for raw in f:
+                    line = raw.strip()
+                    if not line:
+                        good_offset += len(raw)
+                        continue
+                    try:
+                        entry = orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        # Trailing line may be a partial write from a crash
+                        logger.warning("Dropping corrupt trailing WAL entry")
+                        corrupt_tail = True
+                        break
+                    self._store_record(entry["id"], entry["rec"])
+                    replayed += 1
+                    good_offset += len(raw)
+        except OSError as e:
+            logger.warning(f"Failed to replay WAL: {e}")
+            return
+
+        if corrupt_tail:
+            # Cut the partial line off before the WAL is reopened for
+            # appending - writing onto the fragment would merge the next
+            # record into the corrupt line, and a later replay would
+            # stop there and lose everything written after recovery
+            try:
+                with open(self.wal_path, 'r+b') as f:
+                    f.truncate(good_offset)
+            except OSError as e:
+                logger.warning(f"Failed to truncate corrupt WAL tail: {e}")
+
+        if replayed:
+            logger.info(f"📦 Replayed {replayed} tracks from write-ahead log")
+            self._dirty = True
+
+    def _append_wal(self, file_id: str, rec: Dict[str, Any]) -> None:
+        """Append a single track record to the write-ahead log."""
+        try:
+            with self._io_lock:
+                self._wal.write(orjson.dumps({"id": file_id, "rec": rec}) + b"\n")
+        except OSError as e:
+            logger.error(f"Failed to append to WAL: {e}")
+
+    def _store_record(self, file_id: str, rec: Dict[str, Any]) -> None:
+        """Write one track record into the columns, appending or updating."""
+        cols = self.data["columns"]
+        values = (
+            file_id, rec.get("file_name"), rec.get("file_path"),
+            rec.get("file_size"), rec.get("title"), rec.get("artist"),
+            rec.get("album"), rec.get("genre"), rec.get("year")
+        )
+
+        row = self._index.get(file_id)
+        if row is None:
+            for name, value in zip(self.COLUMN_NAMES, values):
+                cols[name].append(value)
+            self._index[file_id] = len(cols["file_ids"]) - 1
+        else:
+            for name, value in zip(self.COLUMN_NAMES, values):
+                cols[name][row] = value
+            self._track_objs.pop(file_id, None)
+
+    def _truncate_wal(self) -> None:
+        """Discard WAL contents after a successful checkpoint."""
+        try:
+            with self._io_lock:
+                self._wal.flush()
+                self._wal.truncate(0)
+                self._wal.seek(0)
+        except OSError as e:
+            logger.warning(f"Failed to truncate WAL: {e}")
+
     def save(self, force: bool = False) -> None:
         if not self._dirty and not force:
             return
@@ -119,55 +320,76 @@ class MetadataCache:
         self.cache_path.parent.mkdir(parents=True, exist_ok=True)
         
         temp_path = self.cache_path.with_suffix('.tmp')
-        
+
         try:
-            with open(temp_path, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=2, ensure_ascii=False)
-            
+            temp_path.write_bytes(_zstd_compressor.compress(orjson.dumps(self.data)))
+
             temp_path.replace(self.cache_path)
-            
-            track_count = len(self.data.get('tracks', {}))
+            self._truncate_wal()
+
+            track_count = len(self.data["columns"]["file_ids"])
             logger.info(f"💾 Saved metadata cache: {track_count} tracks")
             self._dirty = False
             self._new_entries = 0
-            
+            self._unflushed = 0
+
         except Exception as e:
             logger.error(f"Failed to save cache: {e}")
             if temp_path.exists():
                 temp_path.unlink()
-        
+
     def _maybe_auto_save(self) -> None:
-        if self._new_entries >= self.auto_save_interval:
-            logger.info(f"Auto-saving metadata cache ({self._new_entries} new entries)...")
-            self.save()
+        """Hand WAL appends to the background writer for flushing."""
+        if self._unflushed >= self.auto_save_interval:
+            logger.info(f"Flushing metadata WAL ({self._unflushed} new entries)...")
+            try:
+                self._flush_queue.put_nowait(True)
+            except queue.Full:
+                pass  # a flush is already queued and will cover these entries
+            self._unflushed = 0
         
+    @staticmethod
+    def _intern(value: Optional[str]) -> Optional[str]:
+        """Intern repeated metadata strings (artists, genres, albums)."""
+        return sys.intern(value) if value else value
+
+    def _get_pooled_track(self, file_id: str, row: int) -> TrackInfo:
+        """Return the pooled TrackInfo for a row, building it on first use."""
+        track = self._track_objs.get(file_id)
+        if track is None:
+            cols = self.data["columns"]
+            track = TrackInfo(
+                title=cols["titles"][row] or "",
+                artist=self._intern(cols["artists"][row] or ""),
+                album=self._intern(cols["albums"][row]),
+                genre=self._intern(cols["genres"][row]),
+                year=cols["years"][row],
+                file_path=cols["file_paths"][row]
+            )
+            self._track_objs[file_id] = track
+        return track
+
     def get_cached_track(self, file_id: str, file_size: Optional[int] = None) -> Optional[TrackInfo]:
-        cached = self.data["tracks"].get(file_id)
-        
-        if not cached:
+        row = self._index.get(file_id)
+
+        if row is None:
             self._misses += 1
             return None
-            
-        if file_size is not None and cached.get("file_size") != file_size:
+
+        cols = self.data["columns"]
+
+        if file_size is not None and cols["file_sizes"][row] != file_size:
             self._misses += 1
+            self._track_objs.pop(file_id, None)
             return None
-            
-        metadata = cached.get("metadata", {})
-        
-        if not metadata.get("title") or not metadata.get("artist"):
+
+        if not cols["titles"][row] or not cols["artists"][row]:
             self._misses += 1
             return None
-            
+
         self._hits += 1
-        
-        return TrackInfo(
-            title=metadata.get("title", ""),
-            artist=metadata.get("artist", ""),
-            album=metadata.get("album"),
-            genre=metadata.get("genre"),
-            year=metadata.get("year"),
-            file_path=cached.get("file_path")
-        )
+
+        return self._get_pooled_track(file_id, row)
         
     def cache_track(
         self, 
@@ -177,57 +399,73 @@ class MetadataCache:
         file_size: Optional[int],
         track: TrackInfo
     ) -> None:
-        self.data["tracks"][file_id] = {
-            "file_id": file_id,
+        rec = {
             "file_name": file_name,
             "file_path": file_path,
             "file_size": file_size,
-            "cached_at": datetime.now().isoformat(),
-            "metadata": {
-                "title": track.title,
-                "artist": track.artist,
-                "album": track.album,
-                "genre": track.genre,
-                "year": track.year
-            }
+            "title": track.title,
+            "artist": self._intern(track.artist),
+            "album": self._intern(track.album),
+            "genre": self._intern(track.genre),
+            "year": track.year
         }
-        
+        self._store_record(file_id, rec)
+        self._track_objs[file_id] = track
+
+        self._append_wal(file_id, rec)
         self._dirty = True
         self._new_entries += 1
+        self._unflushed += 1
         self._maybe_auto_save()
         
     def get_all_cached_tracks(self) -> List[TrackInfo]:
-        tracks = []
-        for file_id, cached in self.data["tracks"].items():
-            metadata = cached.get("metadata", {})
-            if metadata.get("title") and metadata.get("artist"):
-                track = TrackInfo(
-                    title=metadata["title"],
-                    artist=metadata["artist"],
-                    album=metadata.get("album"),
-                    genre=metadata.get("genre"),
-                    year=metadata.get("year"),
-                    file_path=cached.get("file_path")
-                )
-                tracks.append(track)
+        cols = self.data["columns"]
+        # Preallocate at full size; list.append's doubling would reallocate
+        # several times for a large library
+        tracks = [None] * len(cols["file_ids"])
+        count = 0
+        for row, file_id in enumerate(cols["file_ids"]):
+            if cols["titles"][row] and cols["artists"][row]:
+                tracks[count] = self._get_pooled_track(file_id, row)
+                count += 1
+        del tracks[count:]
         return tracks
-        
-    def remove_deleted_files(self, current_file_ids: Set[str]) -> int:
-        cached_ids = set(self.data["tracks"].keys())
-        deleted_ids = cached_ids - current_file_ids
-        
-        for file_id in deleted_ids:
-            del self.data["tracks"][file_id]
-            
+
+    def remove_deleted_files(self, current_file_ids: Iterable[str]) -> int:
+        # Accept any iterable; the membership loop below needs a real
+        # set, so normalize once here rather than at every call site
+        if not isinstance(current_file_ids, (set, frozenset)):
+            current_file_ids = set(current_file_ids)
+
+        cols = self.data["columns"]
+
+        # Single membership pass: split rows into kept and deleted
+        keep = []
+        deleted_ids = []
+        for row, fid in enumerate(cols["file_ids"]):
+            if fid in current_file_ids:
+                keep.append(row)
+            else:
+                deleted_ids.append(fid)
+
         if deleted_ids:
+            # Compact every column in one pass and rebuild the row index
+            for name in self.COLUMN_NAMES:
+                col = cols[name]
+                cols[name] = [col[row] for row in keep]
+            self._index = {fid: row for row, fid in enumerate(cols["file_ids"])}
+
+            for file_id in deleted_ids:
+                self._track_objs.pop(file_id, None)
+
             logger.info(f"Removed {len(deleted_ids)} deleted files from cache")
             self._dirty = True
-            
+
         return len(deleted_ids)
         
     def get_stats(self) -> Dict[str, Any]:
         return {
-            "total_cached": len(self.data["tracks"]),
+            "total_cached": len(self._index),
             "cache_hits": self._hits,
             "cache_misses": self._misses,
             "hit_rate": self._hits / (self._hits + self._misses) if (self._hits + self._misses) > 0 else 0,
@@ -237,6 +475,9 @@ class MetadataCache:
         
     def clear(self) -> None:
         self.data = self._empty_cache()
+        self._index.clear()
+        self._track_objs.clear()
+        self._truncate_wal()
         self._dirty = True
         logger.info("Metadata cache cleared")
 
@@ -273,17 +514,25 @@ class TasteProfileCache:
         """Load cache from disk or create empty cache."""
         if self.cache_path.exists():
             try:
-                with open(self.cache_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
+                if self.cache_path.stat().st_size == 0:
+                    logger.warning("Profile cache file is empty. Will rebuild.")
+                    return self._empty_cache()
+
+                with open(self.cache_path, 'rb') as f, \
+                        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if mm[:4] == ZSTD_MAGIC:
+                        data = orjson.loads(_zstd_decompressor.decompress(mm))
+                    else:
+                        data = orjson.loads(memoryview(mm))
+
                 if data.get('version') != PROFILE_VERSION:
                     logger.warning("Profile cache version mismatch. Will rebuild.")
                     return self._empty_cache()
-                    
+
                 logger.info(f"📦 Loaded taste profile cache")
                 return data
-                
-            except (json.JSONDecodeError, KeyError) as e:
+
+            except (orjson.JSONDecodeError, zstd.ZstdError, OSError, KeyError) as e:
                 logger.warning(f"Failed to load profile cache: {e}")
                 return self._empty_cache()
         else:
@@ -295,6 +544,7 @@ class TasteProfileCache:
             "version": PROFILE_VERSION,
             "created_at": None,
             "library_fingerprint": None,
+            "source_mtime": None,
             "profile": None,
             "stats": None
         }
@@ -307,11 +557,10 @@ class TasteProfileCache:
         self.cache_path.parent.mkdir(parents=True, exist_ok=True)
         
         temp_path = self.cache_path.with_suffix('.tmp')
-        
+
         try:
-            with open(temp_path, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=2, ensure_ascii=False)
-            
+            temp_path.write_bytes(_zstd_compressor.compress(orjson.dumps(self.data)))
+
             temp_path.replace(self.cache_path)
             logger.info(f"💾 Saved taste profile cache")
             self._dirty = False
@@ -324,27 +573,40 @@ class TasteProfileCache:
     @staticmethod
     def _compute_library_fingerprint(tracks: List[TrackInfo]) -> Dict[str, Any]:
         """Compute a fingerprint of the track library."""
-        track_strings = sorted([
-            f"{t.artist.lower().strip()}|{t.title.lower().strip()}"
+        # Encode once and sort as bytes (C memcmp), then feed the hash
+        # incrementally - avoids building one giant joined string
+        lines = [
+            f"{t.artist.lower().strip()}|{t.title.lower().strip()}".encode('utf-8')
             for t in tracks
-        ])
-        
-        combined = "\n".join(track_strings)
-        hash_value = hashlib.sha256(combined.encode('utf-8')).hexdigest()[:16]
-        
+        ]
+        lines.sort()
+
+        h = _fingerprint_hasher()
+        for line in lines:
+            h.update(line)
+            h.update(b"\n")
+        hash_value = h.hexdigest()[:16]
+
         return {
             "track_count": len(tracks),
             "hash": hash_value
         }
     
-    def is_valid_for_library(self, tracks: List[TrackInfo]) -> bool:
+    def is_valid_for_library(
+        self,
+        tracks: List[TrackInfo],
+        metadata_cache_path: Optional[str] = None,
+        verify_on_match: bool = True
+    ) -> bool:
         """
         Check if cached profile is still valid for the current library.
-        
+
         Returns True if:
         - Cache exists
+        - The metadata cache file's mtime is unchanged (fast path), or
+        - The library content hash matches, or
         - Track count difference is within threshold (default: 75)
-        
+
         Note: We use a threshold-based approach because:
         - Small library changes don't significantly affect taste profile
         - Avoids expensive rebuilds for minor additions/deletions
@@ -353,18 +615,55 @@ class TasteProfileCache:
         if self.data.get("profile") is None:
             logger.info("No cached profile found")
             return False
-            
+
         if self.data.get("library_fingerprint") is None:
             logger.info("No library fingerprint in cache")
             return False
-            
+
+        # Fast path: metadata cache file untouched since the profile was built,
+        # so the library can't have changed - skip the O(N) rehash entirely
+        if metadata_cache_path and self.data.get("source_mtime") is not None:
+            try:
+                current_mtime = os.path.getmtime(metadata_cache_path)
+            except OSError:
+                current_mtime = None
+            if current_mtime == self.data["source_mtime"]:
+                # Auto-saves append to the WAL without touching the
+                # checkpoint file, so an untouched checkpoint only
+                # proves the library unchanged when no WAL entries are
+                # pending
+                try:
+                    wal_pending = (
+                        Path(metadata_cache_path).with_suffix('.wal').stat().st_size > 0
+                    )
+                except OSError:
+                    wal_pending = False
+                if not wal_pending:
+                    logger.info("✅ Taste profile valid (metadata cache mtime unchanged)")
+                    return True
+
         cached_fingerprint = self.data["library_fingerprint"]
         cached_count = cached_fingerprint.get("track_count", 0)
         current_count = len(tracks)
+
+        # Content check: identical hash means same library even if the
+        # cache file was rewritten - refresh the stored mtime and keep going
+        current_fingerprint = self._compute_library_fingerprint(tracks)
+        if current_fingerprint["hash"] == cached_fingerprint.get("hash"):
+            logger.info(f"✅ Taste profile valid (library content unchanged, {current_count} tracks)")
+            if metadata_cache_path:
+                self._refresh_source_mtime(metadata_cache_path)
+            return True
         
         # Calculate the difference
         count_diff = abs(current_count - cached_count)
-        
+
+        if verify_on_match and count_diff == 0:
+            # Same track count but a different hash (checked above): the
+            # library content changed - don't serve a stale profile
+            logger.info(f"Library content changed with same track count ({current_count}). Will rebuild.")
+            return False
+
         if count_diff >= self.rebuild_threshold:
             logger.info(f"Library changed significantly: {cached_count} → {current_count} tracks "
                        f"(diff: {count_diff} >= threshold: {self.rebuild_threshold})")
@@ -376,9 +675,18 @@ class TasteProfileCache:
             logger.info(f"✅ Using cached taste profile (within threshold)")
         else:
             logger.info(f"✅ Taste profile cache is valid ({current_count} tracks)")
-            
+
         return True
-        
+
+    def _refresh_source_mtime(self, metadata_cache_path: str) -> None:
+        """Write back the metadata cache mtime so the fast path hits next run."""
+        try:
+            self.data["source_mtime"] = os.path.getmtime(metadata_cache_path)
+        except OSError:
+            return
+        self._dirty = True
+        self.save()
+
     def get_cached_profile(self) -> Optional[Tuple[Dict[str, float], Set[str], List[str]]]:
         """Get cached taste profile."""
         profile = self.data.get("profile")
@@ -401,16 +709,27 @@ class TasteProfileCache:
         genre_weights: Dict[str, float],
         artist_ids: Set[str],
         track_ids: List[str],
-        top_artists: Optional[List[str]] = None
+        top_artists: Optional[List[str]] = None,
+        metadata_cache_path: Optional[str] = None
     ) -> None:
         """Cache the taste profile."""
         fingerprint = self._compute_library_fingerprint(tracks)
-        top_genres = sorted(genre_weights.keys(), key=lambda g: genre_weights[g], reverse=True)[:20]
-        
+        # Partial selection in O(N log 20) with a C-level key, instead of
+        # fully sorting every genre with a Python lambda
+        top_genres = [g for g, _ in nlargest(20, genre_weights.items(), key=itemgetter(1))]
+
+        source_mtime = None
+        if metadata_cache_path:
+            try:
+                source_mtime = os.path.getmtime(metadata_cache_path)
+            except OSError:
+                pass
+
         self.data = {
             "version": PROFILE_VERSION,
             "created_at": datetime.now().isoformat(),
             "library_fingerprint": fingerprint,
+            "source_mtime": source_mtime,
             "rebuild_threshold": self.rebuild_threshold,
             "profile": {
                 "genre_weights": genre_weights,
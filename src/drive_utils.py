@@ -4,9 +4,13 @@ Supports recursive folder traversal and header-only downloads for ID3 tags.
 """
 
 import io
+import re
 import json
 import logging
-from typing import Generator, Dict, Any, Optional
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Generator, Dict, Any, List, Optional, Tuple
 
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
@@ -14,8 +18,19 @@ from googleapiclient.http import MediaIoBaseDownload
 
 logger = logging.getLogger(__name__)
 
+# Concurrent folder listings - discovery is network-latency bound, so
+# overlapping requests gives near-linear speedup up to this many folders
+MAX_LIST_WORKERS = 16
+
+# Drive allows up to 100 sub-requests per batched HTTP call; batching
+# sibling folder listings amortizes the TLS/HTTP round-trip overhead
+DRIVE_BATCH_SIZE = 100
+
 # Supported audio formats
 AUDIO_EXTENSIONS = {'.mp3', '.m4a', '.flac', '.wav', '.ogg', '.opus', '.aac', '.wma'}
+# str.endswith takes a tuple and loops in C - much cheaper than a
+# Python-level any() over the set, and this runs once per listed file
+AUDIO_EXTENSIONS_TUPLE = tuple(AUDIO_EXTENSIONS)
 AUDIO_MIMETYPES = {
     'audio/mpeg', 'audio/mp4', 'audio/x-m4a', 'audio/flac', 
     'audio/wav', 'audio/ogg', 'audio/opus', 'audio/aac',
@@ -23,18 +38,18 @@ AUDIO_MIMETYPES = {
 }
 
 
+# Matches the folder ID in /folders/<id> and ?id=<id> style URLs
+_FOLDER_ID_RE = re.compile(r'(?:/folders/|[?&]id=)([A-Za-z0-9_-]+)')
+
+
 def extract_folder_id(folder_url: str) -> str:
     """Extract folder ID from Google Drive URL."""
-    # Handle various URL formats
-    if '/folders/' in folder_url:
-        folder_id = folder_url.split('/folders/')[-1].split('?')[0].split('/')[0]
-    elif 'id=' in folder_url:
-        folder_id = folder_url.split('id=')[-1].split('&')[0]
-    else:
-        # Assume it's already a folder ID
-        folder_id = folder_url.strip()
-    
-    return folder_id
+    match = _FOLDER_ID_RE.search(folder_url)
+    if match:
+        return match.group(1)
+
+    # Assume it's already a folder ID
+    return folder_url.strip()
 
 
 def create_drive_service(service_account_json: str):
@@ -52,6 +67,9 @@ def create_drive_service(service_account_json: str):
         )
         
         service = build('drive', 'v3', credentials=credentials)
+        # Keep credentials around so worker threads can build their own
+        # service (the underlying http transport is not thread-safe)
+        service._mr_credentials = credentials
         logger.info("Google Drive service created successfully")
         return service
         
@@ -66,69 +84,226 @@ def is_audio_file(file_info: Dict[str, Any]) -> bool:
     mime_type = file_info.get('mimeType', '')
     
     # Check extension
-    has_audio_ext = any(name.endswith(ext) for ext in AUDIO_EXTENSIONS)
-    
-    # Check MIME type
-    has_audio_mime = mime_type in AUDIO_MIMETYPES or mime_type.startswith('audio/')
-    
+    has_audio_ext = name.endswith(AUDIO_EXTENSIONS_TUPLE)
+
+    # Check MIME type (prefix check first - most hits are audio/* forms)
+    has_audio_mime = mime_type.startswith('audio/') or mime_type in AUDIO_MIMETYPES
+
     return has_audio_ext or has_audio_mime
 
 
+_thread_local = threading.local()
+
+
+def _thread_service(service):
+    """
+    Get a Drive service safe to use on the current thread.
+    Builds one per worker thread from the stored credentials.
+    """
+    credentials = getattr(service, '_mr_credentials', None)
+    if credentials is None:
+        return service
+
+    local_service = getattr(_thread_local, 'service', None)
+    if local_service is None:
+        local_service = build('drive', 'v3', credentials=credentials)
+        _thread_local.service = local_service
+    return local_service
+
+
+# A listing job: (folder_id, page_token, path)
+_ListJob = Tuple[str, Optional[str], str]
+
+
+def _list_folders_batch(service, jobs: List[_ListJob]):
+    """
+    List several folders in one batched HTTP request (runs on a worker
+    thread). Returns a list of (files, next_token, folder_id, path).
+    """
+    svc = _thread_service(service)
+    results = []
+
+    def _make_callback(folder_id: str, path: str):
+        def _callback(request_id, response, exception):
+            if exception is not None:
+                logger.error(f"Error listing folder {folder_id}: {exception}")
+                return
+            results.append((
+                response.get('files', []),
+                response.get('nextPageToken'),
+                folder_id,
+                path
+            ))
+        return _callback
+
+    batch = svc.new_batch_http_request()
+    for folder_id, page_token, path in jobs:
+        request = svc.files().list(
+            q=f"'{folder_id}' in parents and trashed = false",
+            spaces='drive',
+            fields='nextPageToken, files(id, name, mimeType, size)',
+            pageToken=page_token,
+            pageSize=1000
+        )
+        batch.add(request, callback=_make_callback(folder_id, path))
+    batch.execute()
+
+    return results
+
+
 def list_audio_files_recursive(
-    service, 
-    folder_id: str, 
+    service,
+    folder_id: str,
     path: str = ""
 ) -> Generator[Dict[str, Any], None, None]:
     """
     Recursively list all audio files in a Google Drive folder.
-    
+
+    Subfolders are listed concurrently and in batches: every folder is a
+    separate network round-trip, so sibling listings are packed into
+    batched HTTP calls (up to 100 per request) spread over a thread pool,
+    overlapping latency instead of walking one folder at a time.
+
     Yields:
         Dict with keys: id, name, mimeType, size, path
     """
+    queued: deque = deque([(folder_id, None, path)])
+
+    with ThreadPoolExecutor(max_workers=MAX_LIST_WORKERS) as executor:
+        in_flight = set()
+
+        while queued or in_flight:
+            # Pack queued folders into batches and keep the pool busy
+            while queued and len(in_flight) < MAX_LIST_WORKERS:
+                jobs = []
+                while queued and len(jobs) < DRIVE_BATCH_SIZE:
+                    jobs.append(queued.popleft())
+                in_flight.add(executor.submit(_list_folders_batch, service, jobs))
+
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                try:
+                    batch_results = future.result()
+                except Exception as e:
+                    logger.error(f"Error listing files: {e}")
+                    continue
+
+                for files, next_token, src_folder_id, src_path in batch_results:
+                    for file_info in files:
+                        file_path = f"{src_path}/{file_info['name']}" if src_path else file_info['name']
+
+                        # If it's a folder, queue it for listing
+                        if file_info['mimeType'] == 'application/vnd.google-apps.folder':
+                            logger.debug(f"Entering subfolder: {file_path}")
+                            queued.append((file_info['id'], None, file_path))
+
+                        # If it's an audio file, yield it
+                        elif is_audio_file(file_info):
+                            file_info['path'] = file_path
+                            logger.debug(f"Found audio file: {file_path}")
+                            yield file_info
+
+                    # More pages in this folder
+                    if next_token:
+                        queued.append((src_folder_id, next_token, src_path))
+
+
+def _list_all(service, query: str, fields: str) -> Generator[Dict[str, Any], None, None]:
+    """Page through a flat Drive query, yielding file dicts."""
     page_token = None
-    
     while True:
-        try:
-            # Query for files in this folder
-            query = f"'{folder_id}' in parents and trashed = false"
-            
-            response = service.files().list(
-                q=query,
-                spaces='drive',
-                fields='nextPageToken, files(id, name, mimeType, size)',
-                pageToken=page_token,
-                pageSize=1000
-            ).execute()
-            
-            files = response.get('files', [])
-            
-            for file_info in files:
-                file_path = f"{path}/{file_info['name']}" if path else file_info['name']
-                
-                # If it's a folder, recurse into it
-                if file_info['mimeType'] == 'application/vnd.google-apps.folder':
-                    logger.debug(f"Entering subfolder: {file_path}")
-                    yield from list_audio_files_recursive(
-                        service, 
-                        file_info['id'], 
-                        file_path
-                    )
-                    
-                # If it's an audio file, yield it
-                elif is_audio_file(file_info):
-                    file_info['path'] = file_path
-                    logger.debug(f"Found audio file: {file_path}")
-                    yield file_info
-                    
-            page_token = response.get('nextPageToken')
-            if not page_token:
-                break
-                
-        except Exception as e:
-            logger.error(f"Error listing files in folder {folder_id}: {e}")
+        response = service.files().list(
+            q=query,
+            spaces='drive',
+            fields=fields,
+            pageToken=page_token,
+            pageSize=1000
+        ).execute()
+
+        yield from response.get('files', [])
+
+        page_token = response.get('nextPageToken')
+        if not page_token:
             break
 
 
+def list_audio_files_flat(
+    service,
+    folder_id: str
+) -> Generator[Dict[str, Any], None, None]:
+    """
+    List all audio files under a folder using flat queries.
+
+    Drive can't filter by arbitrary ancestor, but it can return every
+    visible file in O(total / page_size) requests. So instead of one
+    request per folder, do one pass over folders to map the tree and one
+    pass over files, then reconstruct paths locally from the parents
+    field and keep only files that chain up to the target folder.
+
+    Yields:
+        Dict with keys: id, name, mimeType, size, path
+    """
+    # Map every visible folder to (name, parent) to rebuild paths locally
+    folder_parent: Dict[str, Tuple[str, Optional[str]]] = {}
+    for f in _list_all(
+        service,
+        "mimeType = 'application/vnd.google-apps.folder' and trashed = false",
+        'nextPageToken, files(id, name, parents)'
+    ):
+        parents = f.get('parents') or []
+        folder_parent[f['id']] = (f['name'], parents[0] if parents else None)
+
+    def _path_from_root(parent_id: Optional[str]) -> Optional[str]:
+        """Folder path relative to the root, or None if outside the tree."""
+        parts = []
+        seen = set()
+        while parent_id and parent_id not in seen:
+            if parent_id == folder_id:
+                return '/'.join(reversed(parts))
+            seen.add(parent_id)
+            entry = folder_parent.get(parent_id)
+            if entry is None:
+                return None
+            name, parent_id = entry
+            parts.append(name)
+        return None
+
+    for file_info in _list_all(
+        service,
+        "mimeType != 'application/vnd.google-apps.folder' and trashed = false",
+        'nextPageToken, files(id, name, mimeType, size, parents)'
+    ):
+        if not is_audio_file(file_info):
+            continue
+
+        parents = file_info.get('parents') or []
+        rel_path = _path_from_root(parents[0]) if parents else None
+        if rel_path is None:
+            continue
+
+        file_path = f"{rel_path}/{file_info['name']}" if rel_path else file_info['name']
+        file_info['path'] = file_path
+        logger.debug(f"Found audio file: {file_path}")
+        yield file_info
+
+
+def _get_download_buffer() -> io.BytesIO:
+    """
+    Reusable per-thread download buffer.
+
+    Downloads happen once per file during a scan; reusing one BytesIO
+    per thread avoids allocating a fresh buffer for every file.
+    """
+    buffer = getattr(_thread_local, 'download_buffer', None)
+    if buffer is None:
+        buffer = io.BytesIO()
+        _thread_local.download_buffer = buffer
+    buffer.seek(0)
+    buffer.truncate(0)
+    return buffer
+
+
 def download_file_header(service, file_id: str, bytes_to_read: int = 65536) -> Optional[bytes]:
     """
     Download only the first N bytes of a file (enough for ID3 tags).
@@ -142,21 +317,21 @@ def download_file_header(service, file_id: str, bytes_to_read: int = 65536) -> O
         Bytes of file header, or None on error
     """
     try:
-        request = service.files().get_media(fileId=file_id)
-        
-        # Add range header to only get first N bytes
-        request.headers['Range'] = f'bytes=0-{bytes_to_read - 1}'
-        
-        buffer = io.BytesIO()
-        downloader = MediaIoBaseDownload(buffer, request)
-        
-        done = False
-        while not done:
-            _, done = downloader.next_chunk()
-            
-        buffer.seek(0)
-        return buffer.read()
-        
+        # A 64KB header read doesn't need MediaIoBaseDownload's resumable
+        # chunking state machine - one ranged GET on the authorized
+        # transport does the job in a single round-trip
+        uri = f"https://www.googleapis.com/drive/v3/files/{file_id}?alt=media"
+        response, content = _thread_service(service)._http.request(
+            uri,
+            headers={'Range': f'bytes=0-{bytes_to_read - 1}'}
+        )
+
+        if response.status in (200, 206):
+            return content
+
+        logger.warning(f"Failed to download header for file {file_id}: HTTP {response.status}")
+        return None
+
     except Exception as e:
         logger.warning(f"Failed to download header for file {file_id}: {e}")
         return None
@@ -176,17 +351,16 @@ def download_full_file(service, file_id: str) -> Optional[bytes]:
     """
     try:
         request = service.files().get_media(fileId=file_id)
-        buffer = io.BytesIO()
+        buffer = _get_download_buffer()
         downloader = MediaIoBaseDownload(buffer, request)
-        
+
         done = False
         while not done:
             status, done = downloader.next_chunk()
             if status:
                 logger.debug(f"Download progress: {int(status.progress() * 100)}%")
-                
-        buffer.seek(0)
-        return buffer.read()
+
+        return buffer.getvalue()
         
     except Exception as e:
         logger.error(f"Failed to download file {file_id}: {e}")
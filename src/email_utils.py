@@ -2,38 +2,31 @@
 Email utilities for sending HTML recommendation reports via Gmail SMTP.
 """
 
+import io
 import smtplib
 import logging
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
-from typing import List
+from functools import lru_cache
+from typing import List, Optional
+
+import jinja2
+from markupsafe import Markup, escape
 
 from recommender import Recommendation
 
 logger = logging.getLogger(__name__)
 
-
-def generate_html_email(recommendations: List[Recommendation], stats: dict) -> str:
-    """
-    Generate HTML email content with recommendations.
-    
-    Args:
-        recommendations: List of Recommendation objects
-        stats: Dictionary with statistics (total_files, tracks_parsed, etc.)
-        
-    Returns:
-        HTML string
-    """
-    current_date = datetime.now().strftime("%B %Y")
-    
-    html = f"""
+# Compiled once at import: rendering emits in O(N) instead of growing a
+# string with += per track, and autoescape handles HTML escaping
+_HTML_TEMPLATE_SRC = """\
 <!DOCTYPE html>
 <html>
 <head>
     <meta charset="utf-8">
     <style>
-        body {{
+        body {
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Helvetica, Arial, sans-serif;
             line-height: 1.6;
             color: #333;
@@ -41,39 +34,39 @@ def generate_html_email(recommendations: List[Recommendation], stats: dict) -> s
             margin: 0 auto;
             padding: 20px;
             background-color: #f5f5f5;
-        }}
-        .container {{
+        }
+        .container {
             background-color: white;
             border-radius: 12px;
             padding: 30px;
             box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }}
-        h1 {{
+        }
+        h1 {
             color: #1DB954;
             margin-bottom: 10px;
             font-size: 28px;
-        }}
-        .subtitle {{
+        }
+        .subtitle {
             color: #666;
             margin-bottom: 30px;
             font-size: 14px;
-        }}
-        .stats {{
+        }
+        .stats {
             background-color: #f8f9fa;
             border-radius: 8px;
             padding: 15px;
             margin-bottom: 25px;
             font-size: 13px;
             color: #666;
-        }}
-        .track {{
+        }
+        .track {
             border-bottom: 1px solid #eee;
             padding: 15px 0;
-        }}
-        .track:last-child {{
+        }
+        .track:last-child {
             border-bottom: none;
-        }}
-        .track-number {{
+        }
+        .track-number {
             display: inline-block;
             width: 30px;
             height: 30px;
@@ -85,38 +78,38 @@ def generate_html_email(recommendations: List[Recommendation], stats: dict) -> s
             font-weight: bold;
             font-size: 14px;
             margin-right: 15px;
-        }}
-        .track-info {{
+        }
+        .track-info {
             display: inline-block;
             vertical-align: top;
             width: calc(100% - 60px);
-        }}
-        .track-title {{
+        }
+        .track-title {
             font-weight: 600;
             font-size: 16px;
             color: #222;
-        }}
-        .track-artist {{
+        }
+        .track-artist {
             color: #666;
             font-size: 14px;
-        }}
-        .track-album {{
+        }
+        .track-album {
             color: #999;
             font-size: 12px;
             margin-top: 2px;
-        }}
-        .track-meta {{
+        }
+        .track-meta {
             margin-top: 8px;
             font-size: 12px;
-        }}
-        .track-genres {{
+        }
+        .track-genres {
             color: #888;
             font-style: italic;
-        }}
-        .links {{
+        }
+        .links {
             margin-top: 8px;
-        }}
-        .links a {{
+        }
+        .links a {
             display: inline-block;
             padding: 6px 12px;
             margin-right: 8px;
@@ -124,77 +117,64 @@ def generate_html_email(recommendations: List[Recommendation], stats: dict) -> s
             text-decoration: none;
             font-size: 12px;
             font-weight: 500;
-        }}
-        .spotify-link {{
+        }
+        .spotify-link {
             background-color: #1DB954;
             color: white;
-        }}
-        .spotify-link:hover {{
+        }
+        .spotify-link:hover {
             background-color: #1ed760;
-        }}
-        .youtube-link {{
+        }
+        .youtube-link {
             background-color: #FF0000;
             color: white;
-        }}
-        .youtube-link:hover {{
+        }
+        .youtube-link:hover {
             background-color: #cc0000;
-        }}
-        .score {{
+        }
+        .score {
             color: #999;
             font-size: 11px;
             margin-top: 5px;
-        }}
-        .footer {{
+        }
+        .footer {
             margin-top: 30px;
             padding-top: 20px;
             border-top: 1px solid #eee;
             font-size: 12px;
             color: #999;
             text-align: center;
-        }}
+        }
     </style>
 </head>
 <body>
     <div class="container">
         <h1>🎵 Your Monthly Music Picks</h1>
-        <p class="subtitle">{current_date} • Based on your music library</p>
-        
+        <p class="subtitle">{{ current_date }} • Based on your music library</p>
+
         <div class="stats">
-            📁 Analyzed <strong>{stats.get('total_files', 0)}</strong> files • 
-            🎵 Found <strong>{stats.get('tracks_parsed', 0)}</strong> tracks • 
-            🎯 Generated <strong>{len(recommendations)}</strong> recommendations
+            📁 Analyzed <strong>{{ stats.get('total_files', 0) }}</strong> files •
+            🎵 Found <strong>{{ stats.get('tracks_parsed', 0) }}</strong> tracks •
+            🎯 Generated <strong>{{ recommendations | length }}</strong> recommendations
         </div>
-"""
-    
-    for i, rec in enumerate(recommendations, 1):
-        genres_str = ", ".join(rec.genres[:3]) if rec.genres else "—"
-        
-        html += f"""
+{% for rec in recommendations %}
         <div class="track">
-            <span class="track-number">{i}</span>
+            <span class="track-number">{{ loop.index }}</span>
             <div class="track-info">
-                <div class="track-title">{_escape_html(rec.title)}</div>
-                <div class="track-artist">{_escape_html(rec.artist)}</div>
-                <div class="track-album">📀 {_escape_html(rec.album)}</div>
+                <div class="track-title">{{ rec.title | esc }}</div>
+                <div class="track-artist">{{ rec.artist | esc }}</div>
+                <div class="track-album">📀 {{ rec.album | esc }}</div>
                 <div class="track-meta">
-                    <span class="track-genres">🏷️ {genres_str}</span>
+                    <span class="track-genres">🏷️ {{ ", ".join(rec.genres[:3]) if rec.genres else "—" }}</span>
                 </div>
                 <div class="links">
-"""
-        
-        if rec.spotify_url:
-            html += f'                    <a href="{rec.spotify_url}" class="spotify-link">▶ Spotify</a>\n'
-            
-        html += f'                    <a href="{rec.youtube_url}" class="youtube-link">▶ YouTube</a>\n'
-        
-        html += f"""
+{% if rec.spotify_url %}                    <a href="{{ rec.spotify_url }}" class="spotify-link">▶ Spotify</a>
+{% endif %}                    <a href="{{ rec.youtube_url }}" class="youtube-link">▶ YouTube</a>
                 </div>
-                <div class="score">Match score: {rec.score:.2f} • Popularity: {rec.popularity}</div>
+                <div class="score">Match score: {{ "%.2f" | format(rec.score) }} • Popularity: {{ rec.popularity }}</div>
             </div>
         </div>
-"""
-    
-    html += """
+{% endfor %}
         <div class="footer">
             Generated by Music Recommender 🎧<br>
             Based on Spotify recommendations & your taste profile
@@ -203,25 +183,97 @@ def generate_html_email(recommendations: List[Recommendation], stats: dict) -> s
 </body>
 </html>
 """
-    
-    return html
+
+@lru_cache(maxsize=1024)
+def _escape_cached(text: str) -> Markup:
+    """Escape with memoization - artist/album strings repeat across recs."""
+    return escape(text)
+
+
+def _esc(text) -> Markup:
+    """Template filter: cached escape for short strings, direct otherwise."""
+    if not isinstance(text, str) or len(text) > 256:
+        return escape(text)
+    return _escape_cached(text)
+
+
+_ENV = jinja2.Environment(autoescape=True, auto_reload=False)
+_ENV.filters['esc'] = _esc
+
+# from_string compiles the template to specialized Python bytecode at
+# import: the static CSS/header/footer become constant strings in the
+# generated code and only the track loop is evaluated per render
+_HTML_TEMPLATE = _ENV.from_string(_HTML_TEMPLATE_SRC)
 
 
-def _escape_html(text: str) -> str:
-    """Escape HTML special characters."""
-    return (text
-        .replace('&', '&amp;')
-        .replace('<', '&lt;')
-        .replace('>', '&gt;')
-        .replace('"', '&quot;')
-        .replace("'", '&#39;'))
+def iter_html_chunks(
+    recommendations: List[Recommendation],
+    stats: dict,
+    current_date: Optional[str] = None
+):
+    """
+    Yield the HTML report in chunks via template streaming.
+
+    Lets callers write straight to a file with writelines, keeping peak
+    memory at one chunk instead of the whole document.
+    """
+    if current_date is None:
+        current_date = datetime.now().strftime("%B %Y")
+
+    return _HTML_TEMPLATE.generate(
+        recommendations=recommendations,
+        stats=stats,
+        current_date=current_date
+    )
+
+
+def generate_html_email(
+    recommendations: List[Recommendation],
+    stats: dict,
+    current_date: Optional[str] = None
+) -> str:
+    """
+    Generate HTML email content with recommendations.
 
+    Args:
+        recommendations: List of Recommendation objects
+        stats: Dictionary with statistics (total_files, tracks_parsed, etc.)
+        current_date: Preformatted "Month Year" string (now() when None)
+
+    Returns:
+        HTML string
+    """
+    return "".join(iter_html_chunks(recommendations, stats, current_date))
 
-def generate_plain_text_email(recommendations: List[Recommendation], stats: dict) -> str:
+
+_SEP = "-" * 40 + "\n"
+
+# One constant format string shared across iterations - the static text
+# between fields is a single str object instead of being rebuilt by
+# f-string concatenation per track
+_TEXT_TRACK_FMT = """
+{num}. {title}
+   Artist: {artist}
+   Album: {album}
+   Genres: {genres}
+   Popularity: {popularity} | Score: {score:.2f}
+{spotify_block}   YouTube: {youtube_url}
+"""
+
+
+def generate_plain_text_email(
+    recommendations: List[Recommendation],
+    stats: dict,
+    current_date: Optional[str] = None
+) -> str:
     """Generate plain text version of the email."""
-    current_date = datetime.now().strftime("%B %Y")
-    
-    text = f"""
+    if current_date is None:
+        current_date = datetime.now().strftime("%B %Y")
+
+    # Accumulate in a StringIO - amortized O(N) writes with no
+    # intermediate fragment list to hold and join
+    buf = io.StringIO()
+    buf.write(f"""
 🎵 YOUR MONTHLY MUSIC PICKS - {current_date}
 {'=' * 50}
 
@@ -234,29 +286,66 @@ Library Stats:
 TOP RECOMMENDATIONS
 {'=' * 50}
 
-"""
-    
+""")
+
     for i, rec in enumerate(recommendations, 1):
-        genres_str = ", ".join(rec.genres[:3]) if rec.genres else "N/A"
-        
-        text += f"""
-{i}. {rec.title}
-   Artist: {rec.artist}
-   Album: {rec.album}
-   Genres: {genres_str}
-   Popularity: {rec.popularity} | Score: {rec.score:.2f}
-"""
-        if rec.spotify_url:
-            text += f"   Spotify: {rec.spotify_url}\n"
-        text += f"   YouTube: {rec.youtube_url}\n"
-        text += "-" * 40 + "\n"
-    
-    text += """
+        buf.write(_TEXT_TRACK_FMT.format_map({
+            'num': i,
+            'title': rec.title,
+            'artist': rec.artist,
+            'album': rec.album,
+            'genres': ", ".join(rec.genres[:3]) if rec.genres else "N/A",
+            'popularity': rec.popularity,
+            'score': rec.score,
+            'spotify_block': f"   Spotify: {rec.spotify_url}\n" if rec.spotify_url else "",
+            'youtube_url': rec.youtube_url,
+        }))
+        buf.write(_SEP)
+
+    buf.write("""
 ---
 Generated by Music Recommender
-"""
-    
-    return text
+""")
+
+    return buf.getvalue()
+
+
+class SMTPSession:
+    """
+    One authenticated SMTP connection reused across several sends.
+
+    Opening a connection costs a TCP handshake, a TLS negotiation and a
+    LOGIN; holding the session open pays that once per batch instead of
+    once per message.
+    """
+
+    def __init__(
+        self,
+        smtp_user: str,
+        smtp_password: str,
+        smtp_server: str = "smtp.gmail.com",
+        smtp_port: int = 587
+    ):
+        self.smtp_user = smtp_user
+        self.smtp_password = smtp_password
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self.srv: Optional[smtplib.SMTP] = None
+
+    def __enter__(self) -> "SMTPSession":
+        logger.info(f"Connecting to SMTP server {self.smtp_server}:{self.smtp_port}")
+        self.srv = smtplib.SMTP(self.smtp_server, self.smtp_port)
+        self.srv.starttls()
+        self.srv.login(self.smtp_user, self.smtp_password)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if self.srv is not None:
+            try:
+                self.srv.quit()
+            except Exception:
+                pass
+            self.srv = None
 
 
 def send_email(
@@ -267,11 +356,14 @@ def send_email(
     smtp_user: str,
     smtp_password: str,
     smtp_server: str = "smtp.gmail.com",
-    smtp_port: int = 587
+    smtp_port: int = 587,
+    html_content: Optional[str] = None,
+    text_content: Optional[str] = None,
+    session: Optional[SMTPSession] = None
 ) -> bool:
     """
     Send recommendations email via Gmail SMTP.
-    
+
     Args:
         recommendations: List of Recommendation objects
         stats: Dictionary with statistics
@@ -281,23 +373,30 @@ def send_email(
         smtp_password: SMTP password (App Password for Gmail)
         smtp_server: SMTP server hostname
         smtp_port: SMTP server port
-        
+        html_content: Prebuilt HTML body (generated here when None)
+        text_content: Prebuilt plain-text body (generated here when None)
+        session: Open SMTPSession to send through (one-shot connection
+            when None)
+
     Returns:
         True if successful, False otherwise
     """
     try:
         current_date = datetime.now().strftime("%B %Y")
         subject = f"🎵 Your Monthly Music Recommendations - {current_date}"
-        
+
         # Create message
         msg = MIMEMultipart('alternative')
         msg['Subject'] = subject
         msg['From'] = sender
         msg['To'] = to
-        
-        # Generate content
-        text_content = generate_plain_text_email(recommendations, stats)
-        html_content = generate_html_email(recommendations, stats)
+
+        # Generate content unless the caller already built it, reusing
+        # the date formatted for the subject line
+        if text_content is None:
+            text_content = generate_plain_text_email(recommendations, stats, current_date)
+        if html_content is None:
+            html_content = generate_html_email(recommendations, stats, current_date)
         
         # Attach parts (plain text first, then HTML)
         part1 = MIMEText(text_content, 'plain', 'utf-8')
@@ -305,15 +404,14 @@ def send_email(
         
         msg.attach(part1)
         msg.attach(part2)
-        
-        # Send email
-        logger.info(f"Connecting to SMTP server {smtp_server}:{smtp_port}")
-        
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_user, smtp_password)
-            server.sendmail(sender, [to], msg.as_string())
-            
+
+        # Send email, reusing an open session when the caller has one
+        if session is not None and session.srv is not None:
+            session.srv.sendmail(sender, [to], msg.as_string())
+        else:
+            with SMTPSession(smtp_user, smtp_password, smtp_server, smtp_port) as one_shot:
+                one_shot.srv.sendmail(sender, [to], msg.as_string())
+
         logger.info(f"Email sent successfully to {to}")
         return True
         
@@ -321,7 +419,52 @@ def send_email(
         logger.error(f"SMTP authentication failed: {e}")
         logger.error("Make sure you're using an App Password, not your regular password")
         return False
-        
+
     except Exception as e:
         logger.error(f"Failed to send email: {e}")
-        return False
\ No newline at end of file
+        return False
+
+
+def send_bulk(
+    recommendations: List[Recommendation],
+    stats: dict,
+    sender: str,
+    recipients: List[str],
+    smtp_user: str,
+    smtp_password: str,
+    smtp_server: str = "smtp.gmail.com",
+    smtp_port: int = 587
+) -> int:
+    """
+    Send the same recommendations email to several recipients over one
+    SMTP connection. Returns the number of successful sends.
+    """
+    # Build both bodies once for the whole batch
+    html_content = generate_html_email(recommendations, stats)
+    text_content = generate_plain_text_email(recommendations, stats)
+
+    sent = 0
+    try:
+        with SMTPSession(smtp_user, smtp_password, smtp_server, smtp_port) as session:
+            for to in recipients:
+                if send_email(
+                    recommendations=recommendations,
+                    stats=stats,
+                    sender=sender,
+                    to=to,
+                    smtp_user=smtp_user,
+                    smtp_password=smtp_password,
+                    smtp_server=smtp_server,
+                    smtp_port=smtp_port,
+                    html_content=html_content,
+                    text_content=text_content,
+                    session=session
+                ):
+                    sent += 1
+    except smtplib.SMTPAuthenticationError as e:
+        logger.error(f"SMTP authentication failed: {e}")
+        logger.error("Make sure you're using an App Password, not your regular password")
+    except Exception as e:
+        logger.error(f"Failed to send bulk email: {e}")
+
+    return sent
\ No newline at end of file
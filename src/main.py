@@ -7,6 +7,7 @@ Uses caching for efficiency.
 import sys
 import logging
 import yaml
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import List
 
@@ -15,9 +16,9 @@ src_path = Path(__file__).parent
 sys.path.insert(0, str(src_path))
 
 from drive_utils import (
-    create_drive_service, 
-    extract_folder_id, 
-    list_audio_files_recursive,
+    create_drive_service,
+    extract_folder_id,
+    list_audio_files_flat,
     download_file_header
 )
 from recommender import (
@@ -29,7 +30,11 @@ from recommender import (
     parse_filename,
     LibraryIndex
 )
-from email_utils import send_email, generate_html_email
+from email_utils import (
+    send_email,
+    generate_html_email,
+    generate_plain_text_email
+)
 from cache_utils import (
     MetadataCache, 
     TasteProfileCache,
@@ -49,6 +54,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Concurrent header downloads - fetching 64KB per file is dominated by
+# network latency, so overlapping requests scales nearly linearly
+MAX_DOWNLOAD_WORKERS = 16
+
 
 def load_config(config_path: str = "config.yaml") -> dict:
     """Load configuration from YAML file."""
@@ -83,69 +92,84 @@ def process_audio_files_with_cache(
     processed_count = 0
     cached_count = 0
     failed_count = 0
-    
+
     total_files = len(audio_files)
-    current_file_ids = {f['id'] for f in audio_files}
-    
-    # Remove deleted files from cache
-    cache.remove_deleted_files(current_file_ids)
-    
+
+    # Remove deleted files from cache; the cache builds its own set, so
+    # a generator avoids materializing an intermediate one here
+    cache.remove_deleted_files(f['id'] for f in audio_files)
+
     logger.info(f"Processing {total_files} audio files...")
     logger.info(f"💡 Tip: Press Ctrl+C anytime - progress will be saved!")
-    
+
+    # Serve cache hits first, collecting the files that need a download.
+    # Sizes were normalized to int right after listing.
+    to_process = []
+    for file_info in audio_files:
+        cached_track = cache.get_cached_track(file_info['id'], file_info.get('size'))
+        if cached_track:
+            tracks.append(cached_track)
+            cached_count += 1
+        else:
+            to_process.append(file_info)
+
+    def _fetch_and_parse(file_info):
+        """Download the header and extract metadata (worker thread)."""
+        file_name = file_info['name']
+        header_bytes = download_file_header(drive_service, file_info['id'])
+
+        track = None
+        if header_bytes:
+            track = extract_metadata_from_bytes(header_bytes, file_name)
+
+        # Fallback to filename parsing
+        if not track:
+            track = parse_filename(file_name)
+
+        return track
+
+    # Downloads are latency-bound, so fan them out over a thread pool;
+    # results are cached on this thread, keeping the cache single-writer
+    executor = ThreadPoolExecutor(max_workers=MAX_DOWNLOAD_WORKERS)
     try:
-        for i, file_info in enumerate(audio_files):
-            file_id = file_info['id']
-            file_name = file_info['name']
-            file_path = file_info.get('path', file_name)
-            file_size = file_info.get('size')
-            
-            # Convert size to int
-            if file_size is not None:
-                try:
-                    file_size = int(file_size)
-                except (ValueError, TypeError):
-                    file_size = None
-            
+        futures = {
+            executor.submit(_fetch_and_parse, file_info): file_info
+            for file_info in to_process
+        }
+
+        for i, future in enumerate(as_completed(futures)):
+            file_info = futures[future]
+
             # Progress logging
             if (i + 1) % 25 == 0 or i == 0:
-                pct = ((i + 1) / total_files) * 100
-                logger.info(f"📊 Progress: {i + 1}/{total_files} ({pct:.1f}%) "
+                done = cached_count + i + 1
+                pct = (done / total_files) * 100
+                logger.info(f"📊 Progress: {done}/{total_files} ({pct:.1f}%) "
                            f"[cached: {cached_count}, new: {processed_count}, skipped: {failed_count}]")
-            
-            # Check cache first
-            cached_track = cache.get_cached_track(file_id, file_size)
-            if cached_track:
-                tracks.append(cached_track)
-                cached_count += 1
-                continue
-            
-            # Download and process
+
             try:
-                header_bytes = download_file_header(drive_service, file_id)
-                
-                track = None
-                if header_bytes:
-                    track = extract_metadata_from_bytes(header_bytes, file_name)
-                
-                # Fallback to filename parsing
-                if not track:
-                    track = parse_filename(file_name)
-                
-                if track:
-                    track.file_path = file_path
-                    tracks.append(track)
-                    cache.cache_track(file_id, file_name, file_path, file_size, track)
-                    processed_count += 1
-                else:
-                    failed_count += 1
-                    
+                track = future.result()
             except Exception as e:
-                logger.debug(f"Error processing {file_name}: {e}")
+                logger.debug(f"Error processing {file_info['name']}: {e}")
                 failed_count += 1
-                
+                continue
+
+            if track:
+                track.file_path = file_info.get('path', file_info['name'])
+                tracks.append(track)
+                cache.cache_track(
+                    file_info['id'], file_info['name'],
+                    track.file_path, file_info['size'], track
+                )
+                processed_count += 1
+            else:
+                failed_count += 1
+
+        executor.shutdown(wait=True)
+
     except KeyboardInterrupt:
         logger.info(f"\n⏸️  Interrupted. Saving progress...")
+        executor.shutdown(wait=False, cancel_futures=True)
         cache.save()
         raise
     
@@ -163,23 +187,23 @@ def process_audio_files_with_cache(
 def build_library_index(tracks: List[TrackInfo], track_ids: List[str]) -> LibraryIndex:
     """Build library index from tracks and Spotify IDs."""
     library_index = LibraryIndex()
-    
-    for track in tracks:
-        library_index.add_track(track)
-    
+
+    library_index.add_tracks_bulk(tracks)
+
     for track_id in track_ids:
         library_index.add_spotify_track_id(track_id)
-    
+
     return library_index
 
 
 def get_or_build_taste_profile(
     tracks: list,
     spotify,
-    profile_cache: TasteProfileCache
+    profile_cache: TasteProfileCache,
+    metadata_cache_path: str = None
 ) -> tuple:
     """Get taste profile from cache or build it fresh."""
-    
+
     # Show current vs cached track counts
     current_count = len(tracks)
     cached_count = profile_cache.get_cached_track_count()
@@ -188,7 +212,7 @@ def get_or_build_taste_profile(
         diff = abs(current_count - cached_count)
         logger.info(f"📊 Library: {current_count} tracks (cached: {cached_count}, diff: {diff})")
     
-    if profile_cache.is_valid_for_library(tracks):
+    if profile_cache.is_valid_for_library(tracks, metadata_cache_path=metadata_cache_path):
         cached = profile_cache.get_cached_profile()
         if cached:
             genre_weights, artist_ids, track_ids = cached
@@ -215,7 +239,8 @@ def get_or_build_taste_profile(
         genre_weights=genre_weights,
         artist_ids=artist_ids,
         track_ids=track_ids,
-        top_artists=top_artists
+        top_artists=top_artists,
+        metadata_cache_path=metadata_cache_path
     )
     
     return genre_weights, artist_ids, track_ids, library_index
@@ -245,7 +270,8 @@ def main():
         })
         
         # Initialize caches with threshold from config
-        metadata_cache = MetadataCache(get_cache_path(config))
+        metadata_cache_path = get_cache_path(config)
+        metadata_cache = MetadataCache(metadata_cache_path)
         rebuild_threshold = get_rebuild_threshold(config)
         profile_cache = TasteProfileCache(
             cache_path=get_profile_cache_path(config),
@@ -269,8 +295,15 @@ def main():
         
         # List audio files from Drive
         logger.info("Scanning Drive folder for audio files...")
-        audio_files = list(list_audio_files_recursive(drive_service, folder_id))
+        audio_files = list(list_audio_files_flat(drive_service, folder_id))
         logger.info(f"Found {len(audio_files)} audio files")
+
+        # Drive returns sizes as strings; normalize to int once here so
+        # downstream consumers don't re-parse per file
+        for f in audio_files:
+            s = f.get('size')
+            f['size'] = int(s) if isinstance(s, str) and s.isdigit() else (
+                s if isinstance(s, int) else None)
         
         if not audio_files:
             logger.error("No audio files found in the specified folder")
@@ -288,7 +321,7 @@ def main():
         
         # Get or build taste profile
         user_genres, user_artist_ids, user_track_ids, library_index = get_or_build_taste_profile(
-            tracks, spotify, profile_cache
+            tracks, spotify, profile_cache, metadata_cache_path
         )
         
         # Log cache stats
@@ -342,14 +375,17 @@ def main():
         out_dir = Path(__file__).parent.parent / 'out'
         out_dir.mkdir(exist_ok=True)
         
+        # MIMEText needs the full HTML string anyway, so build it once
+        # and reuse it for both the email and the on-disk report
         html_output = generate_html_email(recommendations, pipeline_stats)
+        text_output = generate_plain_text_email(recommendations, pipeline_stats)
         output_file = out_dir / 'recommendations.html'
-        
+
         with open(output_file, 'w', encoding='utf-8') as f:
             f.write(html_output)
         logger.info(f"Saved HTML output to: {output_file}")
-        
-        # Send email
+
+        # Send email (reusing the bodies generated above)
         logger.info("Sending recommendation email...")
         email_sent = send_email(
             recommendations=recommendations,
@@ -357,7 +393,9 @@ def main():
             sender=email_config['sender'],
             to=email_config['to'],
             smtp_user=email_config['smtp_user'],
-            smtp_password=email_config['smtp_app_password']
+            smtp_password=email_config['smtp_app_password'],
+            html_content=html_output,
+            text_content=text_output
         )
         
         if email_sent:
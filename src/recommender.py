@@ -3,32 +3,83 @@ Music recommendation engine using Spotify API.
 Features improved artist/title extraction for Asian and instrumental filenames.
 """
 
+from __future__ import annotations
+
+import heapq
 import io
+import os
 import re
+import sys
 import logging
 import urllib.parse
 import random
 from typing import List, Dict, Any, Optional, Tuple, Set
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
+from functools import lru_cache
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
-from spotipy.exceptions import SpotifyException
-import musicbrainzngs
-from mutagen import File as MutagenFile
-from mutagen.id3 import ID3
-from mutagen.mp4 import MP4
-from mutagen.flac import FLAC
+try:
+    import regex as _regex
+except ImportError:
+    _regex = None
+
+try:
+    from rapidfuzz import fuzz as _fuzz
+except ImportError:
+    _fuzz = None
 
 logger = logging.getLogger(__name__)
 
-# Initialize MusicBrainz
-musicbrainzngs.set_useragent(
-    "MusicRecommender",
-    "1.0",
-    "https://github.com/your-username/music-recommender"
-)
+
+def _compile_hot(pattern, flags=0):
+    """Compile a hot-path pattern, preferring the third-party `regex` engine.
+
+    `regex` (VERSION1 mode) is faster than stdlib `re` for the simple
+    non-backtracking patterns used on every filename; falls back to `re`
+    when it isn't installed.
+    """
+    if _regex is not None:
+        return _regex.compile(pattern, flags | _regex.VERSION1)
+    return re.compile(pattern, flags)
+
+# spotipy, musicbrainzngs and mutagen drag in large dependency trees,
+# so they're imported lazily on first use - importing this module just
+# for the dataclasses (e.g. email_utils needing Recommendation) stays
+# cheap. The helpers below cache the imported modules.
+
+
+@lru_cache(maxsize=None)
+def _get_musicbrainz():
+    """Import and configure musicbrainzngs on first use."""
+    import musicbrainzngs
+    musicbrainzngs.set_useragent(
+        "MusicRecommender",
+        "1.0",
+        "https://github.com/your-username/music-recommender"
+    )
+    return musicbrainzngs
+
+
+@lru_cache(maxsize=None)
+def _get_mutagen():
+    """Import mutagen's parsers on first use."""
+    from mutagen import File as MutagenFile
+    from mutagen.id3 import ID3
+    from mutagen.mp3 import MP3
+    from mutagen.mp4 import MP4
+    from mutagen.flac import FLAC
+    return MutagenFile, ID3, MP3, MP4, FLAC
 
 # =============================================================================
 # KNOWN ARTISTS DATABASE
@@ -62,89 +113,177 @@ KNOWN_ARTISTS = {
     "shirfine", "depapepe", "masaaki kishibe",
 }
 
-# Convert to lowercase set for matching
-KNOWN_ARTISTS_LOWER = {a.lower() for a in KNOWN_ARTISTS}
+# Frozen casefolded set for matching - casefold is the Unicode-correct
+# canonicalization for mixed CJK/Latin names
+KNOWN_ARTISTS_LOWER = frozenset(a.casefold() for a in KNOWN_ARTISTS)
+
+
+def _build_artist_automaton():
+    """
+    Build an Aho-Corasick automaton over the known artists.
+
+    Matching every artist against a string is then one pass over the
+    string instead of one substring scan per artist. Falls back to None
+    (and the plain loops below) when pyahocorasick isn't available.
+    """
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for artist in KNOWN_ARTISTS:
+        automaton.add_word(artist.casefold(), artist)
+    automaton.make_automaton()
+    return automaton
+
+
+_ARTIST_AUTOMATON = _build_artist_automaton()
+
+# Fallback-path index: artists pre-folded and sorted by descending
+# length, so the first substring hit is already the longest match and
+# the scan can return immediately. An artist can only appear in a text
+# containing its first character, which gates each candidate with a
+# set lookup before the substring scan.
+_ARTISTS_BY_LEN_DESC = tuple(
+    (a, a.casefold()) for a in sorted(KNOWN_ARTISTS, key=len, reverse=True)
+)
 
 
 def is_known_artist(text: str) -> bool:
     """Check if text contains a known artist name."""
     if not text:
         return False
-    text_lower = text.lower().strip()
-    
+    text_lower = text.casefold().strip()
+
     # Exact match
     if text_lower in KNOWN_ARTISTS_LOWER:
         return True
-    
+
+    if _ARTIST_AUTOMATON is not None:
+        for _ in _ARTIST_AUTOMATON.iter(text_lower):
+            return True
+        # No artist inside the text; the text may still be a fragment
+        # of a longer artist name
+        return any(text_lower in artist for artist in KNOWN_ARTISTS_LOWER)
+
     # Check if any known artist is contained in the text
     for artist in KNOWN_ARTISTS_LOWER:
         if artist in text_lower or text_lower in artist:
             return True
-    
+
     return False
 
 
+@lru_cache(maxsize=16384)
 def extract_known_artist(text: str) -> Optional[str]:
-    """Extract a known artist name from text."""
+    """Extract a known artist name from text (memoized)."""
     if not text:
         return None
-    text_lower = text.lower().strip()
-    
+    text_lower = text.casefold().strip()
+
     # Find the longest matching known artist
-    best_match = None
-    best_len = 0
-    
-    for artist in KNOWN_ARTISTS:
-        artist_lower = artist.lower()
-        if artist_lower in text_lower:
+    if _ARTIST_AUTOMATON is not None:
+        best_match = None
+        best_len = 0
+        for _, artist in _ARTIST_AUTOMATON.iter(text_lower):
             if len(artist) > best_len:
                 best_match = artist
                 best_len = len(artist)
-    
-    return best_match
+        return best_match
+
+    # Length-descending scan: the first hit is the longest match
+    text_chars = set(text_lower)
+    for artist, artist_lower in _ARTISTS_BY_LEN_DESC:
+        if artist_lower[0] in text_chars and artist_lower in text_lower:
+            return artist
+
+    return None
 
 
 # =============================================================================
 # FILENAME CLEANING
 # =============================================================================
 
+# One alternation compiled at import - clean_suffix runs on every
+# filename, and a single scan of the combined pattern replaces ~20
+# sequential re.sub passes. Branch order mirrors the old pass order so
+# the more specific suffixes still win; groups are non-capturing since
+# nothing reads them.
+_SUFFIX_RE = re.compile('|'.join((
+    r'\s*[-_]?\s*official\s*(?:music\s*)?(?:video|mv|audio)',
+    r'\s*[-_]?\s*music\s*video',
+    r'\s*[-_]?\s*lyric[s]?\s*(?:video)?',
+    r'\s*[-_]?\s*\bmv\b',
+    r'\s*[-_]?\s*\bpv\b',
+    r'\s*[-_]?\s*官方(?:完整)?版?\s*(?:mv)?',
+    r'\s*[-_]?\s*歌[词詞]版?',
+    r'\s*[-_]?\s*完整版',
+    r'\s*[-_]?\s*高清',
+    r'\s*[-_]?\s*\b(?:hd|hq|4k)\b',
+    r'\s*[-_]?\s*lyrics?\s*\(?[a-z/]+\)?',
+    r'\s*[-_]?\s*\(?\s*[kK]an/[rR]om/[eE]ng\s*\)?',
+    r'\s*[-_]?\s*\(?\s*[rR]om/[kK]an/[eE]ng\s*\)?',
+    r'\s*\(\s*合唱[：:].+?\)',
+    r'\s*[（\(]\s*[fF]eat\.?.+?[）\)]',
+    r'\s*[（\(]\s*[fF]t\.?.+?[）\)]',
+    r'\s*~[^~]+~',  # Remove ~text~
+    r'\s*\([fF]ingerstyle\s*[gG]uitar\)',
+    r'\s*[fF]ingerstyle\s*[gG]uitar',
+    r'\s*~original\s*song~',
+)), re.IGNORECASE)
+
+_MULTI_SPACE_RE = re.compile(r'\s+')
+_TRAILING_PUNCT_RE = re.compile(r'[\s\-_:]+$')
+_LEADING_PUNCT_RE = re.compile(r'^[\s\-_:]+')
+
+_EXT_RE = _compile_hot(r'\.(mp3|m4a|flac|wav|ogg|opus|aac|wma)$', re.I)
+_MV_SUFFIX_RE = re.compile(r'\s*MV\s*$', re.IGNORECASE)
+# Punctuation that disqualifies a part from looking like an artist name;
+# one C-level scan instead of four separate `in` probes
+_ARTIST_REJECT_RE = re.compile(r'[:(「【]')
+
+# Generic collection folders that never name an artist
+_SKIP_FOLDERS = frozenset({
+    'music', 'songs', 'chinese songs', 'japanese songs', 'korean songs',
+    'english songs', 'anime songs', 'instrumental music & osts',
+    'fingerstyle guitar songs', 'osts',
+})
+
+# All three bracket styles in one alternation - one engine pass per
+# filename instead of up to three sequential match attempts
+_ASIAN_BRACKETS_RE = _compile_hot(
+    r'^(?P<artist>.+?)[\s]*'
+    r'(?:【(?P<t1>[^】]+)】|「(?P<t2>[^」]+)」|『(?P<t3>[^』]+)』)'
+)
+
+# Normalization pattern shared by LibraryIndex. Brackets and whitespace
+# both fall outside the kept word/CJK classes, so replacing runs of
+# non-kept characters with a single space strips brackets, strips
+# punctuation and collapses whitespace in one pass (it used to take three).
+_NORMALIZE_RUN_RE = _compile_hot(r'[^\w\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF]+')
+_LEADING_THE_RE = re.compile(r'^the\s+')
+
+_BRACKET_PATTERNS = [re.compile(p) for p in (
+    r'\s*\([^)]*\)',
+    r'\s*\[[^\]]*\]',
+    r'\s*「[^」]*」',
+    r'\s*『[^』]*』',
+    r'\s*【[^】]*】',
+)]
+
+
+@lru_cache(maxsize=16384)
 def clean_suffix(text: str) -> str:
-    """Remove common video/music suffixes from text."""
+    """Remove common video/music suffixes from text (memoized - the
+    same artist/title strings recur throughout a scan)."""
     if not text:
         return ""
-    
-    suffixes = [
-        r'\s*[-_]?\s*official\s*(music\s*)?(video|mv|audio)',
-        r'\s*[-_]?\s*music\s*video',
-        r'\s*[-_]?\s*lyric[s]?\s*(video)?',
-        r'\s*[-_]?\s*\bmv\b',
-        r'\s*[-_]?\s*\bpv\b',
-        r'\s*[-_]?\s*官方(完整)?版?\s*(mv)?',
-        r'\s*[-_]?\s*歌[词詞]版?',
-        r'\s*[-_]?\s*完整版',
-        r'\s*[-_]?\s*高清',
-        r'\s*[-_]?\s*\b(hd|hq|4k)\b',
-        r'\s*[-_]?\s*lyrics?\s*\(?[a-z/]+\)?',
-        r'\s*[-_]?\s*\(?\s*[kK]an/[rR]om/[eE]ng\s*\)?',
-        r'\s*[-_]?\s*\(?\s*[rR]om/[kK]an/[eE]ng\s*\)?',
-        r'\s*\(\s*合唱[：:].+?\)',
-        r'\s*[（\(]\s*[fF]eat\.?.+?[）\)]',
-        r'\s*[（\(]\s*[fF]t\.?.+?[）\)]',
-        r'\s*~[^~]+~',  # Remove ~text~
-        r'\s*\([fF]ingerstyle\s*[gG]uitar\)',
-        r'\s*[fF]ingerstyle\s*[gG]uitar',
-        r'\s*~original\s*song~',
-    ]
-    
-    result = text
-    for pattern in suffixes:
-        result = re.sub(pattern, '', result, flags=re.IGNORECASE)
-    
+
+    result = _SUFFIX_RE.sub('', text)
+
     # Clean up multiple spaces and trailing punctuation
-    result = re.sub(r'\s+', ' ', result)
-    result = re.sub(r'[\s\-_:]+$', '', result)
-    result = re.sub(r'^[\s\-_:]+', '', result)
-    
+    result = _MULTI_SPACE_RE.sub(' ', result)
+    result = _TRAILING_PUNCT_RE.sub('', result)
+    result = _LEADING_PUNCT_RE.sub('', result)
+
     return result.strip()
 
 
@@ -152,14 +291,12 @@ def remove_parenthetical(text: str) -> str:
     """Remove parenthetical content but keep the main text."""
     if not text:
         return ""
-    
+
     # Remove content in various brackets
-    result = re.sub(r'\s*\([^)]*\)', '', text)
-    result = re.sub(r'\s*\[[^\]]*\]', '', result)
-    result = re.sub(r'\s*「[^」]*」', '', result)
-    result = re.sub(r'\s*『[^』]*』', '', result)
-    result = re.sub(r'\s*【[^】]*】', '', result)
-    
+    result = text
+    for pattern in _BRACKET_PATTERNS:
+        result = pattern.sub('', result)
+
     return result.strip()
 
 
@@ -175,69 +312,78 @@ def extract_from_asian_brackets(text: str) -> Optional[Tuple[str, str]]:
     if not text:
         return None
     
-    patterns = [
-        r'^(.+?)[\s]*【([^】]+)】',
-        r'^(.+?)[\s]*「([^」]+)」',
-        r'^(.+?)[\s]*『([^』]+)』',
-    ]
-    
-    for pattern in patterns:
-        match = re.match(pattern, text)
-        if match:
-            artist_part = match.group(1).strip()
-            title_part = match.group(2).strip()
-            
-            # Clean up
-            artist_part = re.sub(r'\s*MV\s*$', '', artist_part, flags=re.IGNORECASE)
-            artist_part = re.sub(r'\s*[-_]\s*$', '', artist_part)
-            title_part = clean_suffix(title_part)
-            
-            # Try to extract just the artist name
-            extracted = extract_known_artist(artist_part)
-            if extracted:
-                artist_part = extracted
-            
-            if artist_part and title_part:
-                return (artist_part, title_part)
-    
+    match = _ASIAN_BRACKETS_RE.match(text)
+    if match:
+        artist_part = match.group('artist').strip()
+        title_part = (match.group('t1') or match.group('t2') or match.group('t3')).strip()
+
+        # Clean up
+        artist_part = _MV_SUFFIX_RE.sub('', artist_part)
+        artist_part = artist_part.rstrip(' \t-_')
+        title_part = clean_suffix(title_part)
+
+        # Try to extract just the artist name
+        extracted = extract_known_artist(artist_part)
+        if extracted:
+            artist_part = extracted
+
+        if artist_part and title_part:
+            return (artist_part, title_part)
+
     return None
 
 
+# All candidate separators in one scan; priority is applied afterwards
+_SEPARATOR_RE = _compile_hot(r' [/\-–—] ')
+
+
 def find_best_separator(text: str) -> Optional[Tuple[str, int]]:
     """
     Find the best separator in the text.
     Returns (separator, position) or None.
-    
+
     Priority:
     1. Last " / " (slash with spaces) - often "Title / Artist"
     2. Last " - " (dash with spaces) - often "Artist - Title" or "Title - Artist"
     """
     if not text:
         return None
-    
-    # Look for " / " - often indicates "Title / Artist" at the end
-    slash_pos = text.rfind(' / ')
-    if slash_pos > 0 and slash_pos < len(text) - 3:
-        return (' / ', slash_pos)
-    
-    # Look for " - " (with spaces)
-    dash_pos = text.rfind(' - ')
-    if dash_pos > 0 and dash_pos < len(text) - 3:
-        return (' - ', dash_pos)
-    
-    # Look for " – " (en-dash with spaces)
-    endash_pos = text.rfind(' – ')
-    if endash_pos > 0:
-        return (' – ', endash_pos)
-    
-    # Look for " — " (em-dash with spaces)
-    emdash_pos = text.rfind(' — ')
-    if emdash_pos > 0:
-        return (' — ', emdash_pos)
-    
+
+    # One pass over the string collects the last position of every
+    # separator kind, instead of one full rfind scan per kind
+    last_pos = {}
+    for match in _SEPARATOR_RE.finditer(text):
+        last_pos[match.group(0)] = match.start()
+
+    if not last_pos:
+        return None
+
+    limit = len(text) - 3
+    for sep in (' / ', ' - '):
+        pos = last_pos.get(sep)
+        if pos is not None and 0 < pos < limit:
+            return (sep, pos)
+
+    for sep in (' – ', ' — '):
+        pos = last_pos.get(sep)
+        if pos is not None and pos > 0:
+            return (sep, pos)
+
     return None
 
 
+def _looks_like_proper_name(s: str) -> bool:
+    """
+    Check whether s reads like a proper name ("Sungha Jung"):
+    capitalized words of letters. A short-circuiting character check is
+    cheaper than spinning up the regex engine for strings this small.
+    """
+    parts = s.split()
+    return bool(parts) and all(
+        p.isalpha() and p[0].isupper() and p[1:].islower() for p in parts
+    )
+
+
 def determine_artist_title(part1: str, part2: str, separator: str) -> Tuple[str, str]:
     """
     Determine which part is artist and which is title.
@@ -271,18 +417,12 @@ def determine_artist_title(part1: str, part2: str, separator: str) -> Tuple[str,
     # Artists are usually shorter and don't have colons or complex punctuation
     part2_looks_like_artist = (
         len(part2_clean) < 30 and
-        ':' not in part2_clean and
-        '(' not in part2_clean and
-        '「' not in part2_clean and
-        '【' not in part2_clean
+        _ARTIST_REJECT_RE.search(part2_clean) is None
     )
-    
+
     part1_looks_like_artist = (
         len(part1_clean) < 30 and
-        ':' not in part1_clean and
-        '(' not in part1_clean and
-        '「' not in part1_clean and
-        '【' not in part1_clean
+        _ARTIST_REJECT_RE.search(part1_clean) is None
     )
     
     # If part2 looks more like an artist (simpler), swap
@@ -290,7 +430,7 @@ def determine_artist_title(part1: str, part2: str, separator: str) -> Tuple[str,
         return (part2_clean, part1_clean)
     
     # Check if part2 is predominantly a name (capitalized words or CJK)
-    if re.match(r'^[A-Z][a-z]+(\s+[A-Z][a-z]+)*$', part2_clean):
+    if _looks_like_proper_name(part2_clean):
         # part2 is a proper name like "Sungha Jung"
         return (part2_clean, part1_clean)
     
@@ -298,10 +438,11 @@ def determine_artist_title(part1: str, part2: str, separator: str) -> Tuple[str,
     return (part1_clean, part2_clean)
 
 
+@lru_cache(maxsize=16384)
 def parse_filename_smart(filename: str, file_path: str = None) -> Tuple[str, str]:
     """
-    Smart parsing of filename to extract artist and title.
-    
+    Smart parsing of filename to extract artist and title (memoized).
+
     Returns:
         Tuple of (artist, title). Artist may be "Unknown" if not determinable.
     """
@@ -309,7 +450,7 @@ def parse_filename_smart(filename: str, file_path: str = None) -> Tuple[str, str
         return ("Unknown", filename or "Unknown")
     
     # Remove file extension
-    name = re.sub(r'\.(mp3|m4a|flac|wav|ogg|opus|aac|wma)$', '', filename, flags=re.I)
+    name = _EXT_RE.sub('', filename)
     original_name = name
     
     # Try Asian bracket patterns first
@@ -345,15 +486,16 @@ def parse_filename_smart(filename: str, file_path: str = None) -> Tuple[str, str
             if artist and title:
                 return (artist, title)
     
-    # Try to extract artist from folder path
+    # Try to extract artist from folder path, walking parents lazily
+    # from the deepest folder up - no tokenized list, and the walk
+    # stops at the first artist hit
     if file_path:
-        parts = file_path.replace('\\', '/').split('/')
-        for part in reversed(parts[:-1]):  # Exclude filename
-            if part and part.lower() not in ('music', 'songs', 'chinese songs', 
-                                              'japanese songs', 'korean songs',
-                                              'english songs', 'anime songs',
-                                              'instrumental music & osts',
-                                              'fingerstyle guitar songs', 'osts'):
+        remaining = os.path.dirname(file_path)
+        while remaining:
+            remaining, part = os.path.split(remaining)
+            if not part:
+                break
+            if part.lower() not in _SKIP_FOLDERS:
                 artist = extract_known_artist(part)
                 if artist:
                     title = clean_suffix(name_cleaned)
@@ -366,9 +508,7 @@ def parse_filename_smart(filename: str, file_path: str = None) -> Tuple[str, str
         title = name_cleaned
         for variant in [known, known.lower(), known.upper()]:
             title = title.replace(variant, '')
-        title = clean_suffix(title)
-        title = re.sub(r'^[\s\-_/]+', '', title)
-        title = re.sub(r'[\s\-_/]+$', '', title)
+        title = clean_suffix(title).strip(' \t\n\r-_/')
         
         if title:
             return (known, title)
@@ -390,7 +530,7 @@ def parse_filename(filename: str, file_path: str = None) -> Optional['TrackInfo'
     
     # Ensure we have a title
     if not title or len(title.strip()) < 1:
-        title = re.sub(r'\.(mp3|m4a|flac|wav|ogg|opus|aac|wma)$', '', filename, flags=re.I)
+        title = _EXT_RE.sub('', filename)
     
     return TrackInfo(
         title=title.strip(),
@@ -399,11 +539,68 @@ def parse_filename(filename: str, file_path: str = None) -> Optional['TrackInfo'
     )
 
 
+def parse_filenames_bulk(files: List[Tuple[str, Optional[str]]]) -> List['TrackInfo']:
+    """
+    Parse a batch of (filename, file_path) pairs in one call.
+
+    Duplicate names are parsed once and the result reused, so
+    library-wide scans pay the full parse cost only per unique
+    filename. Order of the input is preserved.
+    """
+    parsed: Dict[Tuple[str, Optional[str]], Tuple[str, str]] = {}
+    results = []
+    for filename, file_path in files:
+        key = (filename, file_path)
+        pair = parsed.get(key)
+        if pair is None:
+            pair = parse_filename_smart(filename, file_path)
+            parsed[key] = pair
+        artist, title = pair
+        if not title or len(title.strip()) < 1:
+            title = _EXT_RE.sub('', filename)
+        results.append(TrackInfo(
+            title=title.strip(),
+            artist=artist.strip(),
+            file_path=file_path or filename
+        ))
+    return results
+
+
 # =============================================================================
 # DATA CLASSES
 # =============================================================================
 
-@dataclass
+# Memoized module-level normalizers: pure string functions hit with the
+# same artist/title strings during add_track and again in contains, so
+# a cache hit replaces ~4 regex substitutions with one dict lookup.
+
+@lru_cache(maxsize=16384)
+def _normalize_text(text: str) -> str:
+    if not text:
+        return ""
+
+    text = clean_suffix(text)
+
+    # Strip brackets/punctuation and collapse whitespace in one pass
+    return _NORMALIZE_RUN_RE.sub(' ', text.lower()).strip()
+
+
+@lru_cache(maxsize=16384)
+def _normalize_artist(artist: str) -> str:
+    if not artist:
+        return ""
+
+    artist = artist.strip().lower()
+
+    # Don't normalize "unknown" away - we still want to match on title
+    if artist in ('unknown', 'unknown artist'):
+        return ""
+
+    artist = _LEADING_THE_RE.sub('', artist)
+    return _NORMALIZE_RUN_RE.sub(' ', artist).strip()
+
+
+@dataclass(slots=True)
 class TrackInfo:
     """Represents extracted track metadata."""
     title: str
@@ -413,18 +610,23 @@ class TrackInfo:
     year: Optional[int] = None
     file_path: Optional[str] = None
     spotify_id: Optional[str] = None
-    
+    _key: Tuple[str, str] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        # Identity key computed once - hashing/equality over thousands
+        # of tracks otherwise re-lowercases both fields per comparison
+        self._key = (self.title.lower(), self.artist.lower())
+
     def __hash__(self):
-        return hash((self.title.lower(), self.artist.lower()))
-    
+        return hash(self._key)
+
     def __eq__(self, other):
         if not isinstance(other, TrackInfo):
             return False
-        return (self.title.lower() == other.title.lower() and 
-                self.artist.lower() == other.artist.lower())
+        return self._key == other._key
 
 
-@dataclass  
+@dataclass(slots=True)
 class Recommendation:
     """Represents a recommended track with score and links."""
     title: str
@@ -437,48 +639,40 @@ class Recommendation:
     genres: List[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class LibraryIndex:
     """Index of user's library for efficient duplicate detection."""
     spotify_track_ids: Set[str] = field(default_factory=set)
-    normalized_tracks: Set[str] = field(default_factory=set)
+    # (artist, title) pairs; ("", title) marks the title-only variant.
+    # Tuples of interned strings hash without the formatting cost of
+    # the old "artist|||title" string keys.
+    normalized_tracks: Set[Tuple[str, str]] = field(default_factory=set)
     artist_titles: Set[Tuple[str, str]] = field(default_factory=set)
     song_titles: Set[str] = field(default_factory=set)
     title_variations: Dict[str, Set[str]] = field(default_factory=dict)
+    # Inverted index word -> titles containing it; narrows fuzzy
+    # matching to titles sharing at least one word with the query
+    word_index: Dict[str, Set[str]] = field(default_factory=dict)
+    # Word set per title, built once at add time so contains() doesn't
+    # re-split every candidate on every lookup
+    title_words: Dict[str, Set[str]] = field(default_factory=dict)
+    # Character-bigram postings for the substring test: CJK titles
+    # normalize to a single token, so the word index alone can't
+    # surface them as substring candidates
+    bigram_index: Dict[str, Set[str]] = field(default_factory=dict)
+    # Sorted hash array over normalized_tracks for vectorized bulk
+    # membership screening (None without numpy / before bulk loading)
+    _hash_array: Any = field(default=None, repr=False)
     
     @staticmethod
     def normalize_text(text: str) -> str:
         """Normalize text for matching."""
-        if not text:
-            return ""
-        
-        text = clean_suffix(text)
-        text = text.lower().strip()
-        
-        # Remove brackets and their contents
-        text = re.sub(r'[【】「」『』\[\]()（）]', ' ', text)
-        text = re.sub(r'[^\w\s\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF]', ' ', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
-    
+        return _normalize_text(text)
+
     @staticmethod
     def normalize_artist(artist: str) -> str:
         """Normalize artist name."""
-        if not artist:
-            return ""
-        
-        artist = artist.strip().lower()
-        
-        # Don't normalize "unknown" away - we still want to match on title
-        if artist in ('unknown', 'unknown artist'):
-            return ""
-        
-        artist = re.sub(r'^the\s+', '', artist)
-        artist = re.sub(r'[^\w\s\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF]', ' ', artist)
-        artist = re.sub(r'\s+', ' ', artist).strip()
-        
-        return artist
+        return _normalize_artist(artist)
     
     def add_track(self, track: TrackInfo, spotify_id: Optional[str] = None) -> None:
         """Add a track to the index."""
@@ -487,18 +681,33 @@ class LibraryIndex:
         if track.spotify_id:
             self.spotify_track_ids.add(track.spotify_id)
         
-        norm_artist = self.normalize_artist(track.artist)
-        norm_title = self.normalize_text(track.title)
+        # Interning collapses the many copies of the same artist/title
+        # across index structures and lets set lookups hit the
+        # pointer-equality fast path
+        norm_artist = sys.intern(self.normalize_artist(track.artist))
+        norm_title = sys.intern(self.normalize_text(track.title))
         
         if norm_title:
             if norm_artist:
-                key = f"{norm_artist}|||{norm_title}"
-                self.normalized_tracks.add(key)
-                self.artist_titles.add((norm_artist, norm_title))
-            
+                self.normalized_tracks.add((norm_artist, norm_title))
+
             # Always add title-only for matching
-            self.normalized_tracks.add(f"|||{norm_title}")
+            self.normalized_tracks.add(("", norm_title))
             self.song_titles.add(norm_title)
+            words = set(norm_title.split())
+            self.title_words[norm_title] = words
+            for word in words:
+                self.word_index.setdefault(word, set()).add(norm_title)
+            if len(norm_title) > 1:
+                for i in range(len(norm_title) - 1):
+                    self.bigram_index.setdefault(
+                        norm_title[i:i + 2], set()
+                    ).add(norm_title)
+            else:
+                # Single-character titles have no bigrams; post them
+                # under their one character so queries can still find
+                # them
+                self.bigram_index.setdefault(norm_title, set()).add(norm_title)
             
             if norm_title not in self.title_variations:
                 self.title_variations[norm_title] = set()
@@ -506,8 +715,84 @@ class LibraryIndex:
                 self.title_variations[norm_title].add(norm_artist)
         
         # Add raw lowercase
-        self.artist_titles.add((track.artist.lower(), track.title.lower()))
+        self.artist_titles.add(
+            (sys.intern(track.artist.lower()), sys.intern(track.title.lower()))
+        )
     
+    def add_tracks_bulk(self, tracks: List[TrackInfo]) -> None:
+        """
+        Add many tracks and build the vectorized screening array.
+
+        Adding goes through add_track (the memoized normalizers absorb
+        repeated artists); the hash array is rebuilt once at the end
+        instead of per track.
+        """
+        for track in tracks:
+            self.add_track(track)
+        self._rebuild_hash_array()
+
+    def _rebuild_hash_array(self) -> None:
+        """Pack hashes of the normalized pairs into a numpy array."""
+        if np is None or not self.normalized_tracks:
+            self._hash_array = None
+            return
+        self._hash_array = np.fromiter(
+            (hash(pair) for pair in self.normalized_tracks),
+            dtype=np.int64,
+            count=len(self.normalized_tracks)
+        )
+
+    def contains_bulk(self, candidates: List[TrackInfo]) -> List[bool]:
+        """
+        Check a batch of tracks against the library in one sweep.
+
+        With numpy available, the (artist, title) and title-only hashes
+        of every candidate are screened against the packed library
+        hashes via np.isin. Hits are verified against the real set
+        (hash collisions); misses skip the exact probes entirely and go
+        straight to the fuzzy title match, which is the only check that
+        can still succeed for them.
+        """
+        if np is not None and candidates and self.normalized_tracks:
+            # Tracks added one at a time (build_taste_profile does)
+            # leave the packed hashes stale; rebuild lazily before use
+            if (self._hash_array is None
+                    or len(self._hash_array) != len(self.normalized_tracks)):
+                self._rebuild_hash_array()
+
+            pairs = [
+                (_normalize_artist(c.artist or ""), _normalize_text(c.title or ""))
+                for c in candidates
+            ]
+            cand_hashes = np.fromiter(
+                (h for pair in pairs
+                 for h in (hash(pair), hash(("", pair[1])))),
+                dtype=np.int64,
+                count=2 * len(pairs)
+            )
+            screened = np.isin(cand_hashes, self._hash_array)
+
+            results = []
+            for i, (candidate, pair) in enumerate(zip(candidates, pairs)):
+                if screened[2 * i] and pair in self.normalized_tracks:
+                    results.append(True)
+                elif screened[2 * i + 1] and ("", pair[1]) in self.normalized_tracks:
+                    results.append(True)
+                elif candidate.spotify_id and candidate.spotify_id in self.spotify_track_ids:
+                    results.append(True)
+                else:
+                    results.append(self._fuzzy_title_match(pair[1]))
+            return results
+
+        return [
+            self.contains(
+                spotify_id=candidate.spotify_id,
+                title=candidate.title,
+                artist=candidate.artist
+            )
+            for candidate in candidates
+        ]
+
     def add_spotify_track_id(self, track_id: str) -> None:
         """Add a Spotify track ID to the index."""
         if track_id:
@@ -529,31 +814,70 @@ class LibraryIndex:
         
         # Exact match with artist
         if norm_artist and norm_title:
-            key = f"{norm_artist}|||{norm_title}"
-            if key in self.normalized_tracks:
+            if (norm_artist, norm_title) in self.normalized_tracks:
                 return True
-        
+
         # Title-only match
-        if f"|||{norm_title}" in self.normalized_tracks:
+        if ("", norm_title) in self.normalized_tracks:
             return True
         
         # Check song titles
         if norm_title in self.song_titles:
             return True
-        
-        # Fuzzy title match
-        if norm_title:
+
+        return self._fuzzy_title_match(norm_title)
+
+    def _fuzzy_title_match(self, norm_title: str) -> bool:
+        """
+        Fuzzy title match over the inverted indexes: word postings
+        cover the overlap test, bigram postings cover the substring
+        test (any substring relation in either direction shares at
+        least one bigram), so only titles surfaced by one of them
+        need scanning instead of the whole library.
+        """
+        if not norm_title:
+            return False
+
+        words1 = set(norm_title.split())
+        candidates = set()
+        for word in words1:
+            titles = self.word_index.get(word)
+            if titles:
+                candidates.update(titles)
+        for i in range(len(norm_title) - 1):
+            titles = self.bigram_index.get(norm_title[i:i + 2])
+            if titles:
+                candidates.update(titles)
+        # Single-character titles live under unigram keys
+        for ch in set(norm_title):
+            titles = self.bigram_index.get(ch)
+            if titles:
+                candidates.update(titles)
+
+        qlen = len(norm_title)
+        if qlen == 1:
+            # A one-character query has no bigrams to probe with,
+            # so scan the titles directly (rare enough not to hurt)
             for existing_title in self.song_titles:
-                if norm_title in existing_title or existing_title in norm_title:
+                if norm_title in existing_title:
                     return True
-                if len(norm_title) > 5 and len(existing_title) > 5:
-                    words1 = set(norm_title.split())
-                    words2 = set(existing_title.split())
-                    if words1 and words2:
-                        overlap = len(words1 & words2)
-                        if overlap / max(len(words1), len(words2)) >= 0.6:
-                            return True
-        
+        for existing_title in candidates:
+            # Length filter: only the shorter string can be a
+            # substring of the longer one
+            elen = len(existing_title)
+            if qlen <= elen:
+                if norm_title in existing_title:
+                    return True
+            elif existing_title in norm_title:
+                return True
+
+            if qlen > 5 and elen > 5:
+                words2 = self.title_words.get(existing_title)
+                if words1 and words2:
+                    overlap = len(words1 & words2)
+                    if overlap / max(len(words1), len(words2)) >= 0.6:
+                        return True
+
         return False
     
     def get_stats(self) -> Dict[str, int]:
@@ -570,14 +894,41 @@ class LibraryIndex:
 # SPOTIFY FUNCTIONS
 # =============================================================================
 
+# Parallelism for the per-track Spotify lookups in build_taste_profile;
+# the work is socket-wait, so threads give near-linear speedup up to
+# Spotify's rate limit
+MAX_LOOKUP_WORKERS = 16
+
+
 def create_spotify_client(client_id: str, client_secret: str) -> spotipy.Spotify:
     """Create authenticated Spotify client."""
+    import spotipy
+    from spotipy.oauth2 import SpotifyClientCredentials
+
+    # Spotify responses are deterministic for days; serving repeats from
+    # a local HTTP cache removes the socket round-trip entirely and
+    # spares the rate-limit budget on repeat runs
+    session = None
+    try:
+        import requests_cache
+        session = requests_cache.CachedSession(
+            'spotify_http_cache',
+            expire_after=86400,
+            allowable_codes=(200,)
+        )
+        logger.info("💾 Spotify HTTP cache enabled (24h TTL)")
+    except ImportError:
+        pass
+
     try:
         auth_manager = SpotifyClientCredentials(
             client_id=client_id,
             client_secret=client_secret
         )
-        client = spotipy.Spotify(auth_manager=auth_manager)
+        if session is not None:
+            client = spotipy.Spotify(auth_manager=auth_manager, requests_session=session)
+        else:
+            client = spotipy.Spotify(auth_manager=auth_manager)
         client.search(q="test", type="track", limit=1)
         logger.info("Spotify client authenticated successfully")
         return client
@@ -591,12 +942,46 @@ def extract_metadata_from_bytes(file_bytes: bytes, filename: str, file_path: str
     Extract ID3/metadata tags from file bytes.
     Always returns a TrackInfo (falls back to filename parsing).
     """
+    MutagenFile, ID3, MP3, MP4, FLAC = _get_mutagen()
+
+    # Dispatch on magic bytes where they identify the container -
+    # MutagenFile's probe tries every registered format against the
+    # header, while the first few bytes already name the right parser
+    # for the formats in this library
+    head = file_bytes[:12]
+    parser = None
+    if head[:3] == b'ID3' or head[:2] in (b'\xff\xfb', b'\xff\xf3', b'\xff\xf2'):
+        parser = MP3
+    elif head[:4] == b'fLaC':
+        parser = FLAC
+    elif head[4:8] == b'ftyp':
+        parser = MP4
+
     try:
-        file_obj = io.BytesIO(file_bytes)
-        audio = MutagenFile(file_obj)
-        
+        # Local files are parsed in place - mutagen seeks within the
+        # file and tag frames live in the first few KiB, so nothing
+        # gets buffered. Drive downloads only exist as bytes and go
+        # through BytesIO as before.
+        if file_path and os.path.exists(file_path):
+            file_obj = file_path
+        else:
+            file_obj = io.BytesIO(file_bytes)
+
+        audio = None
+        if parser is not None:
+            try:
+                audio = parser(file_obj)
+            except Exception:
+                # Misleading magic (e.g. truncated header) - re-probe
+                if isinstance(file_obj, io.BytesIO):
+                    file_obj.seek(0)
+
         if audio is None:
-            file_obj.seek(0)
+            audio = MutagenFile(file_obj)
+
+        if audio is None:
+            if isinstance(file_obj, io.BytesIO):
+                file_obj.seek(0)
             try:
                 audio = ID3(file_obj)
             except:
@@ -691,14 +1076,22 @@ def search_spotify_track(
     
     # Build search queries
     queries = []
-    
-    if artist.lower() not in ('unknown', 'unknown artist'):
+
+    artist_known = artist.lower() not in ('unknown', 'unknown artist')
+    if artist_known:
         queries.append(f'track:"{title}" artist:"{artist}"')
         queries.append(f'{artist} {title}')
+
+    # Title-only fallback: for very short or one-word titles ("Home",
+    # "You") with no artist to verify against, the results are junk -
+    # skip the wasted round-trip
+    if len(title) >= 4 and (artist_known or len(title.split()) > 1):
+        queries.append(f'{title}')
     
-    queries.append(f'{title}')  # Title-only search
-    
-    search_kwargs = {"type": "track", "limit": 5}
+    # Spotify charges the same rate-limit token per request regardless
+    # of limit, so ask for the max and filter client-side - a match
+    # missed at limit=5 costs a whole extra query round-trip
+    search_kwargs = {"type": "track", "limit": 50}
     if market:
         search_kwargs["market"] = market
     
@@ -712,21 +1105,10 @@ def search_spotify_track(
                 spotify_artist = item['artists'][0]['name'].lower() if item['artists'] else ''
                 
                 # Title match
-                title_match = (
-                    title.lower() in spotify_title or 
-                    spotify_title in title.lower() or
-                    _similar(title.lower(), spotify_title) > 0.5
-                )
-                
-                if title_match:
+                if _fuzzy_match(title.lower(), spotify_title):
                     # If we have a known artist, verify it matches
                     if artist.lower() not in ('unknown', 'unknown artist'):
-                        artist_match = (
-                            artist.lower() in spotify_artist or
-                            spotify_artist in artist.lower() or
-                            _similar(artist.lower(), spotify_artist) > 0.5
-                        )
-                        if artist_match:
+                        if _fuzzy_match(artist.lower(), spotify_artist):
                             return item
                     else:
                         # No artist to verify, accept on title match
@@ -739,10 +1121,33 @@ def search_spotify_track(
     return None
 
 
+def _fuzzy_match(a: str, b: str) -> bool:
+    """
+    Single typo-tolerant match check for search result filtering.
+
+    partial_ratio subsumes the old containment-both-ways test (a
+    substring scores 100) while also tolerating typos, so one C call
+    replaces three checks per candidate. Falls back to the old triple
+    condition without rapidfuzz.
+    """
+    if not a or not b:
+        return False
+    if _fuzz is not None:
+        return _fuzz.partial_ratio(a, b) >= 80
+    return a in b or b in a or _similar(a, b) > 0.5
+
+
 def _similar(a: str, b: str) -> float:
-    """Simple similarity ratio between two strings."""
+    """Similarity ratio between two strings, in [0, 1].
+
+    Uses RapidFuzz's C-implemented token_set_ratio when available -
+    orders of magnitude faster than the Python fallback and more
+    typo-tolerant than word-set overlap for short titles.
+    """
     if not a or not b:
         return 0.0
+    if _fuzz is not None:
+        return _fuzz.token_set_ratio(a, b) / 100.0
     a_set = set(a.lower().split())
     b_set = set(b.lower().split())
     if not a_set or not b_set:
@@ -752,25 +1157,84 @@ def _similar(a: str, b: str) -> float:
     return intersection / union if union > 0 else 0.0
 
 
+# Per-run memo dicts for the per-artist Spotify helpers. The same
+# artist recurs constantly across library tracks, related-artist top
+# tracks and genre search results, and each miss is a full HTTP
+# round-trip; keyed on the artist id (plus market where it matters)
+# rather than lru_cache so the unhashable client stays out of the key.
+# Failed requests are not cached so transient errors can retry.
+_ARTIST_GENRES_CACHE: Dict[str, List[str]] = {}
+_RELATED_ARTISTS_CACHE: Dict[str, List[Dict[str, Any]]] = {}
+_TOP_TRACKS_CACHE: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+
+
 def get_artist_genres(spotify: spotipy.Spotify, artist_id: str) -> List[str]:
-    """Get genres for an artist from Spotify."""
+    """Get genres for an artist from Spotify (memoized per artist id)."""
+    cached = _ARTIST_GENRES_CACHE.get(artist_id)
+    if cached is not None:
+        return cached
     try:
         artist = spotify.artist(artist_id)
-        return artist.get('genres', [])
+        genres = artist.get('genres', [])
     except:
         return []
+    _ARTIST_GENRES_CACHE[artist_id] = genres
+    return genres
+
+
+def get_artist_genres_bulk(
+    spotify: spotipy.Spotify,
+    artist_ids: Set[str]
+) -> Dict[str, List[str]]:
+    """
+    Fetch genres for many artists at once.
 
+    Spotify's /v1/artists endpoint takes up to 50 ids per request, so
+    this costs one round-trip per 50 unique artists instead of one per
+    artist. Results are shared with the per-artist memo cache.
+    """
+    genre_map = {}
+    to_fetch = []
+    for artist_id in artist_ids:
+        cached = _ARTIST_GENRES_CACHE.get(artist_id)
+        if cached is not None:
+            genre_map[artist_id] = cached
+        elif artist_id:
+            to_fetch.append(artist_id)
+
+    for i in range(0, len(to_fetch), 50):
+        batch = to_fetch[i:i + 50]
+        try:
+            result = spotify.artists(batch)
+        except Exception as e:
+            logger.debug(f"Bulk artist fetch failed: {e}")
+            continue
+        for artist in result.get('artists', []):
+            if artist:
+                genres = artist.get('genres', [])
+                genre_map[artist['id']] = genres
+                _ARTIST_GENRES_CACHE[artist['id']] = genres
 
+    return genre_map
+
+
+@lru_cache(maxsize=4096)
 def get_musicbrainz_tags(artist: str, title: str) -> List[str]:
-    """Get tags/genres from MusicBrainz for a track."""
-    tags = []
-    
+    """Get tags/genres from MusicBrainz for a track (memoized).
+
+    MusicBrainz allows 1 req/s, so every duplicate (artist, title)
+    lookup saved is a full second off the wall clock.
+    """
+    # Collected as a set so duplicates between recording and artist
+    # tags never accumulate - no dedup pass at the end
+    tags = set()
+
     # Skip if artist is unknown
     if artist.lower() in ('unknown', 'unknown artist'):
-        return tags
+        return []
     
     try:
-        result = musicbrainzngs.search_recordings(
+        result = _get_musicbrainz().search_recordings(
             recording=title,
             artist=artist,
             limit=3
@@ -782,7 +1246,7 @@ def get_musicbrainz_tags(artist: str, title: str) -> List[str]:
             if 'tag-list' in recording:
                 for tag in recording['tag-list']:
                     if 'name' in tag:
-                        tags.append(tag['name'].lower())
+                        tags.add(tag['name'].lower())
                         
             if 'artist-credit' in recording:
                 for credit in recording['artist-credit']:
@@ -791,12 +1255,12 @@ def get_musicbrainz_tags(artist: str, title: str) -> List[str]:
                         if 'tag-list' in artist_info:
                             for tag in artist_info['tag-list']:
                                 if 'name' in tag:
-                                    tags.append(tag['name'].lower())
+                                    tags.add(tag['name'].lower())
                                     
     except Exception as e:
         logger.debug(f"MusicBrainz lookup failed for {artist} - {title}: {e}")
         
-    return list(set(tags))
+    return list(tags)
 
 
 def build_taste_profile(
@@ -818,48 +1282,66 @@ def build_taste_profile(
     
     tracks_with_unknown = 0
     tracks_found_on_spotify = 0
-    
-    for i, track in enumerate(tracks):
-        if (i + 1) % 50 == 0:
-            logger.info(f"  Analyzing: {i + 1}/{total} tracks...")
-        
-        # Count artists (but don't count "Unknown")
-        if track.artist.lower() not in ('unknown', 'unknown artist'):
-            artist_names[track.artist.lower()] += 1
-        else:
-            tracks_with_unknown += 1
-        
-        # Always add to library index
-        library_index.add_track(track)
-        
-        # Try to find on Spotify
-        spotify_track = search_spotify_track(spotify, track, market=market)
-        
-        if spotify_track:
-            tracks_found_on_spotify += 1
-            track_id = spotify_track['id']
-            track_ids.append(track_id)
-            
-            library_index.add_spotify_track_id(track_id)
-            track.spotify_id = track_id
-            
-            if spotify_track['artists']:
-                artist = spotify_track['artists'][0]
-                artist_id = artist['id']
-                artist_name = artist['name']
-                artist_ids.add(artist_id)
-                artist_id_to_name[artist_id] = artist_name
-                
-                genres = get_artist_genres(spotify, artist_id)
-                for genre in genres:
-                    genre_counter[genre] += 1
-        
-        # Try MusicBrainz for additional tags
-        if track.artist.lower() not in ('unknown', 'unknown artist'):
-            mb_tags = get_musicbrainz_tags(track.artist, track.title)
-            for tag in mb_tags:
+
+    # The per-track work is almost entirely HTTP wait, so fan the
+    # lookups out over threads and do all state updates (Counters and
+    # LibraryIndex are not threadsafe) in a single reduction pass on
+    # this thread. MusicBrainz gets its own single worker so its
+    # 1 req/s rule holds while Spotify lookups proceed in parallel.
+    with ThreadPoolExecutor(max_workers=MAX_LOOKUP_WORKERS) as pool, \
+         ThreadPoolExecutor(max_workers=1) as mb_pool:
+        spotify_futures = [
+            pool.submit(search_spotify_track, spotify, track, market)
+            for track in tracks
+        ]
+        mb_futures = {}
+        for i, track in enumerate(tracks):
+            if track.artist.lower() not in ('unknown', 'unknown artist'):
+                mb_futures[i] = mb_pool.submit(
+                    get_musicbrainz_tags, track.artist, track.title
+                )
+
+        for i, (track, future) in enumerate(zip(tracks, spotify_futures)):
+            if (i + 1) % 50 == 0:
+                logger.info(f"  Analyzing: {i + 1}/{total} tracks...")
+
+            # Count artists (but don't count "Unknown")
+            if track.artist.lower() not in ('unknown', 'unknown artist'):
+                artist_names[track.artist.lower()] += 1
+            else:
+                tracks_with_unknown += 1
+
+            # Always add to library index
+            library_index.add_track(track)
+
+            spotify_track = future.result()
+
+            if spotify_track:
+                tracks_found_on_spotify += 1
+                track_id = spotify_track['id']
+                track_ids.append(track_id)
+
+                library_index.add_spotify_track_id(track_id)
+                track.spotify_id = track_id
+
+                if spotify_track['artists']:
+                    artist = spotify_track['artists'][0]
+                    artist_id = artist['id']
+                    artist_name = artist['name']
+                    artist_ids.add(artist_id)
+                    artist_id_to_name[artist_id] = artist_name
+
+                    genres = get_artist_genres(spotify, artist_id)
+                    for genre in genres:
+                        genre_counter[genre] += 1
+
+        # MusicBrainz tags trickle in at 1 req/s; merge whatever each
+        # lookup produced
+        for future in mb_futures.values():
+            for tag in future.result():
                 genre_counter[tag] += 0.5
-            
+
+
     total_weight = sum(genre_counter.values()) or 1
     genre_weights = {genre: count / total_weight for genre, count in genre_counter.items()}
     
@@ -892,30 +1374,37 @@ def build_taste_profile(
     return genre_weights, artist_ids, track_ids, top_artist_names, library_index
 
 
+# All exclusion categories in one alternation - one scan of the track
+# name instead of five, with the matched group naming the reason.
+# should_exclude_track runs on every candidate in the scoring loop.
+_EXCLUSION_RE = re.compile(
+    r'\b(?P<remix>remix|refix|bootleg|mashup|vip)\b'
+    r'|\b(?P<cover>cover)\b'
+    r'|\b(?P<live>live)\b'
+    r'|\b(?P<karaoke>karaoke|backing\s*track)\b'
+    r'|\b(?P<instrumental>instrumental)\b',
+    re.IGNORECASE
+)
+
+# reason -> (settings key, default) for masking matches against the
+# enabled categories
+_EXCLUSION_SETTINGS = {
+    'remix': ('exclude_remixes', True),
+    'cover': ('exclude_covers', True),
+    'live': ('exclude_live', True),
+    'karaoke': ('exclude_karaoke', True),
+    'instrumental': ('exclude_instrumentals', False),
+}
+
+
 def should_exclude_track(track_name: str, settings: Dict[str, Any]) -> Tuple[bool, str]:
     """Check if a track should be excluded based on settings."""
-    name_lower = track_name.lower()
-    
-    if settings.get('exclude_remixes', True):
-        if re.search(r'\b(remix|refix|bootleg|mashup|vip)\b', name_lower):
-            return True, "remix"
-    
-    if settings.get('exclude_covers', True):
-        if re.search(r'\bcover\b', name_lower):
-            return True, "cover"
-    
-    if settings.get('exclude_live', True):
-        if re.search(r'\blive\b', name_lower):
-            return True, "live"
-    
-    if settings.get('exclude_karaoke', True):
-        if re.search(r'\b(karaoke|backing\s*track)\b', name_lower):
-            return True, "karaoke"
-    
-    if settings.get('exclude_instrumentals', False):
-        if re.search(r'\binstrumental\b', name_lower):
-            return True, "instrumental"
-    
+    for match in _EXCLUSION_RE.finditer(track_name):
+        reason = match.lastgroup
+        setting_key, default = _EXCLUSION_SETTINGS[reason]
+        if settings.get(setting_key, default):
+            return True, reason
+
     return False, ""
 
 
@@ -930,31 +1419,41 @@ def generate_youtube_url(artist: str, title: str) -> str:
 
 
 def get_related_artists(spotify: spotipy.Spotify, artist_id: str) -> List[Dict[str, Any]]:
-    """Get related artists for a given artist."""
+    """Get related artists for a given artist (memoized per artist id)."""
+    cached = _RELATED_ARTISTS_CACHE.get(artist_id)
+    if cached is not None:
+        return cached
     try:
         result = spotify.artist_related_artists(artist_id)
-        return result.get('artists', [])
+        artists = result.get('artists', [])
     except:
         return []
+    _RELATED_ARTISTS_CACHE[artist_id] = artists
+    return artists
 
 
 def get_artist_top_tracks(
-    spotify: spotipy.Spotify, 
-    artist_id: str, 
+    spotify: spotipy.Spotify,
+    artist_id: str,
     market: str = 'JP'
 ) -> List[Dict[str, Any]]:
-    """Get top tracks for an artist in specified market."""
+    """Get top tracks for an artist in specified market (memoized)."""
+    cached = _TOP_TRACKS_CACHE.get((artist_id, market))
+    if cached is not None:
+        return cached
     try:
         result = spotify.artist_top_tracks(artist_id, country=market)
-        return result.get('tracks', [])
+        tracks = result.get('tracks', [])
     except:
         return []
+    _TOP_TRACKS_CACHE[(artist_id, market)] = tracks
+    return tracks
 
 
 def search_tracks_by_genre(
-    spotify: spotipy.Spotify, 
-    genre: str, 
-    limit: int = 20,
+    spotify: spotipy.Spotify,
+    genre: str,
+    limit: int = 50,
     market: str = None
 ) -> List[Dict[str, Any]]:
     """Search for tracks by genre."""
@@ -973,19 +1472,25 @@ def calculate_score(
     candidate: Dict[str, Any],
     user_genres: Dict[str, float],
     user_artist_ids: Set[str],
-    all_popularities: List[int],
+    popularity_z: float,
     weights: Dict[str, float]
 ) -> float:
-    """Calculate recommendation score for a candidate track."""
+    """
+    Calculate recommendation score for a candidate track.
+
+    popularity_z is the candidate's normalized popularity, computed by
+    the caller for the whole pool at once - the remaining terms are
+    dict/set lookups that stay per-candidate.
+    """
     candidate_genres = set(candidate.get('_genres', []))
-    
+
     # Tag similarity
     if user_genres and candidate_genres:
         matched_weight = sum(user_genres.get(g, 0) for g in candidate_genres)
         tag_similarity = min(matched_weight * 2, 1.0)
     else:
         tag_similarity = 0.3
-    
+
     # Artist affinity
     artist_affinity = 0.0
     if candidate.get('artists'):
@@ -994,31 +1499,28 @@ def calculate_score(
             artist_affinity = 1.0
         else:
             artist_affinity = 0.2
-    
-    # Popularity z-score
-    popularity = candidate.get('popularity', 50)
-    if all_popularities:
-        mean_pop = sum(all_popularities) / len(all_popularities)
-        std_pop = (sum((p - mean_pop) ** 2 for p in all_popularities) / len(all_popularities)) ** 0.5
-        if std_pop > 0:
-            z_score = (popularity - mean_pop) / std_pop
-            popularity_z = (z_score + 3) / 6
-            popularity_z = max(0, min(1, popularity_z))
-        else:
-            popularity_z = 0.5
-    else:
-        popularity_z = popularity / 100
-    
+
     w = weights
     score = (
         w.get('tag_similarity', 0.60) * tag_similarity +
         w.get('artist_affinity', 0.25) * artist_affinity +
         w.get('popularity', 0.15) * popularity_z
     )
-    
+
     return score
 
 
+def _seen_key(name: str, artist: str) -> int:
+    """
+    64-bit dedup key for a candidate track.
+
+    The candidate pool reaches thousands of entries; storing ints
+    instead of lowercased string tuples keeps the seen-set a fraction
+    of the size and makes probes single-word compares.
+    """
+    return hash((name.lower(), artist.lower()))
+
+
 def get_recommendations(
     spotify: spotipy.Spotify,
     track_ids: List[str],
@@ -1070,13 +1572,12 @@ def get_recommendations(
         for track in top_tracks[:5]:
             if not track.get('artists'):
                 continue
-            track_key = (track['name'].lower(), track['artists'][0]['name'].lower())
+            track_key = _seen_key(track['name'], track['artists'][0]['name'])
             if track_key not in seen_tracks:
                 seen_tracks.add(track_key)
-                artist_genres = get_artist_genres(spotify, track['artists'][0]['id'])
-                track['_genres'] = artist_genres
+                # Genres attached in one bulk pass after collection
                 candidates.append(track)
-    
+
     logger.info(f"  → Collected {len(candidates)} tracks from related artists")
     
     # Strategy 2: Genre-based search
@@ -1086,12 +1587,12 @@ def get_recommendations(
         logger.info(f"  → Searching by your top genres: {', '.join(top_genres[:5])}...")
         
         for genre in top_genres:
-            genre_tracks = search_tracks_by_genre(spotify, genre, limit=15, market=market)
+            genre_tracks = search_tracks_by_genre(spotify, genre, limit=50, market=market)
             
             for track in genre_tracks:
                 if not track.get('artists'):
                     continue
-                track_key = (track['name'].lower(), track['artists'][0]['name'].lower())
+                track_key = _seen_key(track['name'], track['artists'][0]['name'])
                 if track_key not in seen_tracks:
                     seen_tracks.add(track_key)
                     track['_genres'] = [genre]
@@ -1104,40 +1605,80 @@ def get_recommendations(
     
     for artist_id in sample_artists[:10]:
         top_tracks = get_artist_top_tracks(spotify, artist_id, market=market)
-        artist_genres = get_artist_genres(spotify, artist_id)
-        
+
         for track in top_tracks:
             if not track.get('artists'):
                 continue
-            track_key = (track['name'].lower(), track['artists'][0]['name'].lower())
+            track_key = _seen_key(track['name'], track['artists'][0]['name'])
             if track_key not in seen_tracks:
                 seen_tracks.add(track_key)
-                track['_genres'] = artist_genres
                 candidates.append(track)
-    
+
     logger.info(f"  → Final candidate pool: {len(candidates)} tracks")
-    
+
     if not candidates:
         logger.warning("No candidate tracks found")
         return []
+
+    # Attach artist genres in one batched pass - one request per 50
+    # unique artists instead of one per candidate. Genre-search hits
+    # already carry the genre they were found under.
+    pending = [c for c in candidates if '_genres' not in c]
+    genre_map = get_artist_genres_bulk(
+        spotify,
+        {c['artists'][0]['id'] for c in pending}
+    )
+    for candidate in pending:
+        candidate['_genres'] = genre_map.get(candidate['artists'][0]['id'], [])
     
     # Scoring and filtering
     logger.info("  → Scoring and filtering candidates...")
     
+    # Normalized popularity for the whole pool in one vectorized pass
+    # (scalar fallback without numpy); the per-candidate loop then only
+    # does the dict/set terms
     all_popularities = [t.get('popularity', 50) for t in candidates]
+    if np is not None:
+        pops = np.asarray(all_popularities, dtype=np.float32)
+        std_pop = float(pops.std())
+        if std_pop > 0:
+            z = (pops - float(pops.mean())) / std_pop
+            pop_z = np.clip((z + 3.0) / 6.0, 0.0, 1.0).tolist()
+        else:
+            pop_z = [0.5] * len(candidates)
+    else:
+        mean_pop = sum(all_popularities) / len(all_popularities)
+        std_pop = (
+            sum((p - mean_pop) ** 2 for p in all_popularities)
+            / len(all_popularities)
+        ) ** 0.5
+        if std_pop > 0:
+            pop_z = [
+                max(0.0, min(1.0, ((p - mean_pop) / std_pop + 3.0) / 6.0))
+                for p in all_popularities
+            ]
+        else:
+            pop_z = [0.5] * len(candidates)
+
+    # Library membership for the whole pool in one bulk screen - the
+    # vectorized probes settle the exact checks up front, so each
+    # candidate runs at most the fuzzy title match afterwards
+    in_library = library_index.contains_bulk([
+        TrackInfo(
+            title=c.get('name', ''),
+            artist=c['artists'][0]['name'] if c.get('artists') else '',
+            spotify_id=c.get('id')
+        )
+        for c in candidates
+    ])
+
     scored_candidates = []
-    
-    for candidate in candidates:
+
+    for i, candidate in enumerate(candidates):
         track_name = candidate.get('name', '')
-        artist_name = candidate['artists'][0]['name'] if candidate.get('artists') else ''
-        track_id = candidate.get('id', '')
-        
+
         # Check if in library
-        if library_index.contains(
-            spotify_id=track_id,
-            title=track_name,
-            artist=artist_name
-        ):
+        if in_library[i]:
             skipped_in_library += 1
             continue
         
@@ -1154,10 +1695,10 @@ def get_recommendations(
         
         # Calculate score
         score = calculate_score(
-            candidate, 
-            user_genres, 
-            artist_ids, 
-            all_popularities,
+            candidate,
+            user_genres,
+            artist_ids,
+            pop_z[i],
             weights
         )
         
@@ -1166,11 +1707,12 @@ def get_recommendations(
     logger.info(f"  → Skipped {skipped_in_library} tracks already in your library")
     logger.info(f"  → Skipped {skipped_excluded} excluded tracks")
     
-    # Sort and take top N
-    scored_candidates.sort(key=lambda x: x[0], reverse=True)
+    # Top N without a full sort - O(N log K) instead of O(N log N),
+    # and the result comes back in descending score order
     max_recs = settings.get('max_recommendations', 30)
-    
-    for score, candidate in scored_candidates[:max_recs]:
+    top_candidates = heapq.nlargest(max_recs, scored_candidates, key=lambda x: x[0])
+
+    for score, candidate in top_candidates:
         artist_name = candidate['artists'][0]['name'] if candidate.get('artists') else 'Unknown'
         track_name = candidate.get('name', 'Unknown')
         album_name = candidate.get('album', {}).get('name', 'Unknown')
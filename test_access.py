@@ -21,22 +21,27 @@ folder_id = folder_url.split('/folders/')[-1].split('?')[0] if '/folders/' in fo
 
 print(f"📁 Folder ID: {folder_id}\n")
 
+# List contents directly - a failed list() already proves the folder is
+# inaccessible, so no separate files().get() round-trip is needed
+files = []
+page_token = None
 try:
-    # Try to get folder metadata
-    folder_meta = service.files().get(fileId=folder_id, fields="name,mimeType").execute()
-    print(f"✅ Folder accessible: {folder_meta['name']}\n")
+    while True:
+        results = service.files().list(
+            q=f"'{folder_id}' in parents and trashed = false",
+            fields="nextPageToken, files(id, name, mimeType)",
+            pageSize=1000,
+            pageToken=page_token
+        ).execute()
+        files.extend(results.get('files', []))
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            break
+    print(f"✅ Folder accessible\n")
 except Exception as e:
     print(f"❌ Cannot access folder: {e}")
     print(f"\n👉 Make sure you shared the folder with the service account email above!")
     exit(1)
-
-# List contents
-results = service.files().list(
-    q=f"'{folder_id}' in parents and trashed = false",
-    fields="files(id, name, mimeType)"
-).execute()
-
-files = results.get('files', [])
 print(f"📄 Items in folder: {len(files)}\n")
 
 for f in files: